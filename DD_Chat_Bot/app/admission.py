@@ -0,0 +1,245 @@
+# app/admission.py
+
+"""
+Admission control for the chat endpoints.
+
+Every request first spends a token from its user's bucket (ADMISSION_USER_RATE
+per second, up to ADMISSION_USER_BURST). It then takes one of
+ADMISSION_MAX_CONCURRENT slots, or waits in a bounded queue where interactive
+chats go before batch work. When the queue is full, a new request displaces
+the newest waiter of a lower class or is turned away at once. Rejected
+requests carry a Retry-After estimate, so an overloaded API answers quickly
+instead of slowing everyone down.
+"""
+
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from app.config import settings
+from app.logging.logger import logger
+
+INTERACTIVE = 0
+BATCH = 1
+CLASS_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+
+class AdmissionRejected(Exception):
+    """The request was shed; `retry_after` is a hint in whole seconds"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1.0) -> float:
+        """Spend `cost` tokens; returns 0 on success, else seconds until they are available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class _Waiter:
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.event = threading.Event()
+        self.admitted = False
+        self.shed = False
+
+
+class AdmissionController:
+    def __init__(self, user_rate: float, user_burst: float, max_concurrent: int, queue_size: int,
+                 queue_timeout: float, max_users: int = 10000):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self.in_flight = 0
+        # Smoothed request duration, used for Retry-After estimates
+        self._service_seconds = 1.0
+        self.counters = {"admitted": 0, "queued": 0, "rate_limited": 0, "queue_full": 0,
+                         "displaced": 0, "queue_timeout": 0}
+
+    def _bucket(self, user_id: str) -> TokenBucket:
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self.user_rate, self.user_burst)
+            while len(self._buckets) > self.max_users:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(user_id)
+        return bucket
+
+    def _queue_wait_estimate(self) -> float:
+        return self._service_seconds * (len(self._waiters) + 1) / max(1, self.max_concurrent)
+
+    def check_rate(self, user_id: str, cost: float = 1.0):
+        """Spend from the user's token bucket or raise AdmissionRejected"""
+        with self._lock:
+            wait = self._bucket(user_id).take(cost)
+            if wait:
+                self.counters["rate_limited"] += 1
+        if wait:
+            raise AdmissionRejected("rate limited", wait)
+
+    def _acquire(self, priority: int):
+        with self._lock:
+            if self.in_flight < self.max_concurrent and not self._waiters:
+                self.in_flight += 1
+                self.counters["admitted"] += 1
+                return
+            if len(self._waiters) >= self.queue_size:
+                worst = max(self._waiters, key=lambda w: (w.priority, w.seq), default=None)
+                if worst is None or worst.priority <= priority:
+                    self.counters["queue_full"] += 1
+                    raise AdmissionRejected("queue full", self._queue_wait_estimate())
+                self._waiters.remove(worst)
+                worst.shed = True
+                worst.event.set()
+                self.counters["displaced"] += 1
+            waiter = _Waiter(priority, next(self._seq))
+            self._waiters.append(waiter)
+            self.counters["queued"] += 1
+
+        waiter.event.wait(self.queue_timeout)
+        with self._lock:
+            if waiter.admitted:
+                return
+            if not waiter.shed:
+                self._waiters.remove(waiter)
+                self.counters["queue_timeout"] += 1
+            retry_after = self._queue_wait_estimate()
+        raise AdmissionRejected("displaced by higher priority work" if waiter.shed else "queue timeout", retry_after)
+
+    def _try_acquire(self) -> bool:
+        """Take a free slot without queueing"""
+        with self._lock:
+            if self.in_flight < self.max_concurrent and not self._waiters:
+                self.in_flight += 1
+                self.counters["admitted"] += 1
+                return True
+        return False
+
+    def _release(self, seconds: float):
+        with self._lock:
+            self._service_seconds = 0.9 * self._service_seconds + 0.1 * seconds
+            self.in_flight -= 1
+            if self._waiters:
+                waiter = min(self._waiters, key=lambda w: (w.priority, w.seq))
+                self._waiters.remove(waiter)
+                waiter.admitted = True
+                self.in_flight += 1
+                self.counters["admitted"] += 1
+                waiter.event.set()
+
+    @contextmanager
+    def slot(self, priority: int = INTERACTIVE):
+        """Hold one of the concurrent request slots for the duration of the block"""
+        self._acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    @contextmanager
+    def slots(self, wanted: int, priority: int = BATCH):
+        """
+        Wait for one slot, then take up to `wanted` in total from those free right now.
+        Yields the number held, which bounds how much work the block may run concurrently.
+        """
+        self._acquire(priority)
+        held = 1
+        while held < wanted and self._try_acquire():
+            held += 1
+        started = time.monotonic()
+        try:
+            yield held
+        finally:
+            elapsed = time.monotonic() - started
+            for _ in range(held):
+                self._release(elapsed)
+
+    @contextmanager
+    def admit(self, user_id: str, priority: int = INTERACTIVE, cost: float = 1.0):
+        """Rate-limit `user_id`, then hold a slot for the duration of the block"""
+        self.check_rate(user_id, cost)
+        with self.slot(priority):
+            yield
+
+    def status(self) -> Dict:
+        with self._lock:
+            queued = {name: 0 for name in CLASS_NAMES.values()}
+            for waiter in self._waiters:
+                queued[CLASS_NAMES[waiter.priority]] += 1
+            return {
+                "in_flight": self.in_flight,
+                "max_concurrent": self.max_concurrent,
+                "queue_depth": len(self._waiters),
+                "queue_size": self.queue_size,
+                "queued_by_class": queued,
+                "tracked_users": len(self._buckets),
+                "avg_service_seconds": round(self._service_seconds, 3),
+                "counters": dict(self.counters)
+            }
+
+
+class _Unlimited:
+    """Stand-in when ADMISSION_ENABLED is off"""
+
+    @contextmanager
+    def admit(self, user_id: str, priority: int = INTERACTIVE, cost: float = 1.0):
+        yield
+
+    @contextmanager
+    def slot(self, priority: int = INTERACTIVE):
+        yield
+
+    @contextmanager
+    def slots(self, wanted: int, priority: int = BATCH):
+        yield wanted
+
+    def check_rate(self, user_id: str, cost: float = 1.0):
+        pass
+
+    def status(self) -> Dict:
+        return {"enabled": False}
+
+
+def build_controller():
+    if not settings.ADMISSION_ENABLED:
+        logger.info("Admission control disabled")
+        return _Unlimited()
+    return AdmissionController(
+        user_rate=settings.ADMISSION_USER_RATE,
+        user_burst=settings.ADMISSION_USER_BURST,
+        max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+        queue_size=settings.ADMISSION_QUEUE_SIZE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        max_users=settings.ADMISSION_MAX_USERS
+    )
+
+
+admission = build_controller()
@@ -1,20 +1,34 @@
-from typing import List, Dict, TypedDict
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, TypedDict
+import numpy as np
 from app.config import settings
-from app.logging.logger import logger
+from app.vector_store import versioned_store
+from app.logging.logger import logger, hot_logger, snippet
 from app.news_fetcher import fetch_combined_news
-from langchain_groq import ChatGroq  
-from langgraph.graph import StateGraph, END
+from app.symbol_index import symbol_index
+from app.intent_router import classify_intent, match_digest_topic, NEWS, SYMBOL, EDUCATIONAL, DIGEST
+from app.digests import digest_store, render_digest
+from app.context_packing import pack_context, format_block, extractive_answer
+from app.embeddings import embed_queries
+from app.llm import invoke as llm_invoke, LLMUnavailable
+from app.profiling import stage, timed_stage
+from app.snapshot import snapshot_handle
+from langgraph.graph import StateGraph, START, END
 import re
 
 class ChatState(TypedDict):
     query: str
     results: List[str]
+    documents: List[Dict]
     response: str
     memory: List[Dict[str, str]]  
     not_related: bool
+    intent: str
+    symbols: List[str]
+    topic: str
+    fallback: bool
 
+@timed_stage("guardrail")
 def check_finance_related_node(state: ChatState):
     """
     Node to check if the user's query is related to finance, market, or economy.
@@ -29,47 +43,218 @@ If it is related, respond with: "Related".
 User Query:
 {state['query']}
 """
-    llm = ChatGroq(model_name=settings.LLM_MODEL)
-    response_obj = llm.invoke(prompt)
-    response_str = response_obj.content if hasattr(response_obj, "content") else str(response_obj)
-    logger.info(f"Guardrail LLM raw response: {response_str.strip()}")
+    try:
+        response_str = llm_invoke(prompt, name="guardrail", deadline=settings.LLM_GUARDRAIL_DEADLINE_SECONDS)
+    except LLMUnavailable as e:
+        # Fail open: a slow guardrail must not block finance questions
+        logger.warning("Guardrail unavailable, treating query as related: %s", e)
+        state["not_related"] = False
+        return state
+    hot_logger.debug("Guardrail LLM raw response: %s", response_str.strip())
     # Make the check more robust
     resp_lower = response_str.strip().lower()
     if "not related" in resp_lower or "your query is not related to finance" in resp_lower:
         state["response"] = "Your query is not related to finance, market, or economy."
         state["results"] = []
+        state["documents"] = []
         state["not_related"] = True
     else:
         state["not_related"] = False
-    logger.info(f"Guardrail check result: {resp_lower}")
+    hot_logger.info("Guardrail check result: %s", "not related" if state["not_related"] else "related")
+    return state
+
+def get_vectorstore():
+    """Vector store for the currently published version (or the replica's snapshot); swaps in new versions between requests"""
+    if snapshot_handle is not None:
+        return snapshot_handle.get()
+    return versioned_store.get()
+
+def _cosine_scores(query_embedding, embeddings):
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+    return matrix @ query / np.where(norms == 0, 1.0, norms)
+
+def _candidates(ids, documents, metadatas, embeddings) -> List[Dict]:
+    """Chunk dicts from a Chroma get/query result, as consumed by context packing"""
+    if embeddings is None:
+        embeddings = [None] * len(ids)
+    return [
+        {"id": cid, "text": doc, "metadata": meta or {}, "embedding": emb}
+        for cid, doc, meta, emb in zip(ids, documents, metadatas, embeddings)
+    ]
+
+def retrieve_by_symbols(vectorstore, symbols, query_embedding, k=20):
+    """
+    Rank only the chunks the symbol index associates with the given tickers.
+    Falls back to the index's most recent mentions when none are semantically close.
+    """
+    chunk_ids = symbol_index.lookup(symbols, limit=settings.SYMBOL_CANDIDATE_LIMIT)
+    if not chunk_ids:
+        return []
+    hits = vectorstore._collection.get(ids=chunk_ids, include=["documents", "metadatas", "embeddings"])
+    if not hits["ids"]:
+        return []
+    candidates = _candidates(hits["ids"], hits["documents"], hits["metadatas"], hits["embeddings"])
+    scores = _cosine_scores(query_embedding, hits["embeddings"])
+    ranked = sorted(zip(scores, candidates), key=lambda x: x[0], reverse=True)
+    relevant = [c for score, c in ranked if score >= settings.SYMBOL_MIN_SIMILARITY][:k]
+    if relevant:
+        return relevant
+    recency = {cid: i for i, cid in enumerate(chunk_ids)}
+    return sorted(candidates, key=lambda c: recency.get(c["id"], len(recency)))[:k]
+
+def _dense_search(vectorstore, query_embeddings, k=20) -> List[List[Dict]]:
+    hits = vectorstore._collection.query(
+        query_embeddings=query_embeddings,
+        n_results=k,
+        include=["documents", "metadatas", "embeddings"]
+    )
+    return [
+        _candidates(ids, documents, metadatas, embeddings)
+        for ids, documents, metadatas, embeddings
+        in zip(hits["ids"], hits["documents"], hits["metadatas"], hits["embeddings"])
+    ]
+
+def _search(vectorstore, query, query_embedding, k=20, symbols=None):
+    """Symbol-filtered search when the query names a known ticker, else plain dense search"""
+    if symbols is None:
+        symbols = symbol_index.extract_symbols(query)
+    if symbols:
+        results = retrieve_by_symbols(vectorstore, symbols, query_embedding, k=k)
+        hot_logger.info("Symbol index matched %s: %d chunks", symbols, len(results))
+        if results:
+            return results
+    return _dense_search(vectorstore, [query_embedding], k=k)[0]
+
+@timed_stage("pack_context")
+def _pack(state: ChatState, query_embedding, candidates: List[Dict]):
+    """Diverse, per-article, budget-trimmed context for the prompt; keeps the blocks' metadata in `documents`"""
+    blocks = pack_context(
+        state["query"], query_embedding, candidates,
+        k=settings.CONTEXT_K,
+        budget_tokens=settings.CONTEXT_TOKEN_BUDGET,
+        lambda_mult=settings.CONTEXT_MMR_LAMBDA
+    )
+    state["documents"] = blocks
+    state["results"] = [format_block(block, i + 1) for i, block in enumerate(blocks)]
     return state
 
+@timed_stage("retrieve")
 def retrieve_news(state: ChatState):
     """Retrieve relevant news articles for the user's query."""
     try:
-        embedder = HuggingFaceEmbeddings(model_name=settings.EMBED_MODEL)
-        vectorstore = Chroma(persist_directory=settings.CHROMA_PATH, embedding_function=embedder)
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
-        docs = retriever.get_relevant_documents(state["query"])
-        state["results"] = [doc.page_content for doc in docs]
-        logger.info(f"Retrieved {len(docs)} news articles for query: {state['query']}")
+        vectorstore = get_vectorstore()
+        with stage("embed_query"):
+            query_embedding = vectorstore.embeddings.embed_query(state["query"])
+        with stage("vector_search"):
+            candidates = _search(vectorstore, state["query"], query_embedding,
+                                 k=settings.CONTEXT_FETCH_K, symbols=state.get("symbols"))
+        _pack(state, query_embedding, candidates)
+        hot_logger.info("Retrieved %d news articles for query: %s", len(state["results"]), snippet(state["query"]))
     except Exception as e:
-        logger.error(f"Error retrieving news: {str(e)}")
+        logger.error("Error retrieving news: %s", e)
         state["results"] = ["Unable to retrieve relevant news at this time."]
+        state["documents"] = []
     return state
 
+def retrieve_symbol_news(state: ChatState):
+    """Retrieve news restricted to the symbols the intent router found in the query."""
+    hot_logger.info("Symbol-filtered retrieval for %s", state.get("symbols"))
+    return retrieve_news(state)
+
+@timed_stage("route_intent")
+def route_intent_node(state: ChatState):
+    """Node classifying the query so educational questions skip retrieval and generic ones are served from a digest."""
+    intent, symbols = classify_intent(state["query"])
+    if intent == NEWS:
+        topic = match_digest_topic(state["query"])
+        if topic and digest_store.get(topic, max_age_minutes=settings.DIGEST_MAX_AGE_MINUTES):
+            intent = DIGEST
+            state["topic"] = topic
+    state["intent"] = intent
+    state["symbols"] = symbols
+    hot_logger.info("Intent router: %s %s", intent, symbols or "")
+    return state
+
+@timed_stage("digest")
+def serve_digest_node(state: ChatState):
+    """Answer a generic news query from the precomputed topic digest, with no retrieval or LLM call."""
+    digest = digest_store.get(state["topic"])
+    state["response"] = render_digest(digest)
+    state["results"] = []
+    state["documents"] = []
+    state["not_related"] = False
+    hot_logger.info("Served %s digest generated at %s", state["topic"], digest["generated_at"])
+    return state
+
+def _retrieval_target(state: ChatState):
+    """Map the routed intent to the retrieval node that serves it, if any"""
+    intent = state.get("intent", NEWS)
+    if intent == EDUCATIONAL:
+        return None
+    return "retrieve_symbol" if intent == SYMBOL else "retrieve"
+
+@timed_stage("retrieve_batch")
+def retrieve_news_batch(queries: List[str], k: Optional[int] = None,
+                        symbols_per_query: Optional[List[List[str]]] = None) -> List[Dict]:
+    """
+    Retrieve news for many queries with one embedding pass and one bulk Chroma query.
+    Returns the packed `results` and `documents` for each query.
+    """
+    k = k or settings.CONTEXT_FETCH_K
+    vectorstore = get_vectorstore()
+    embeddings = embed_queries(vectorstore.embeddings, queries)
+    candidates: List[List[Dict]] = [[] for _ in queries]
+    dense_positions = []
+    for i, (query, embedding) in enumerate(zip(queries, embeddings)):
+        symbols = symbol_index.extract_symbols(query) if symbols_per_query is None else symbols_per_query[i]
+        if symbols:
+            candidates[i] = retrieve_by_symbols(vectorstore, symbols, embedding, k=k)
+        if not candidates[i]:
+            dense_positions.append(i)
+    if dense_positions:
+        dense = _dense_search(vectorstore, [embeddings[i] for i in dense_positions], k=k)
+        for i, hits in zip(dense_positions, dense):
+            candidates[i] = hits
+    contexts = []
+    for query, embedding, hits in zip(queries, embeddings, candidates):
+        packed = _pack({"query": query}, embedding, hits)
+        contexts.append({"results": packed["results"], "documents": packed["documents"]})
+    hot_logger.info("Retrieved news for a batch of %d queries", len(queries))
+    return contexts
+
+@timed_stage("respond")
 def generate_response(state: ChatState):
     """Generate a response using the retrieved news articles and conversation history."""
+    if state.get("intent") == DIGEST and state.get("response"):
+        # Already answered from a topic digest
+        return state
     try:
         # Build conversation history string
         if  state.get("not_related"):
+            # Drop any speculatively retrieved news for off-topic queries
+            state["results"] = []
+            state["documents"] = []
             return state 
         else:
             history = ""
             for turn in state.get("memory", []):
                 history += f"User: {turn['user']}\nBot: {turn['bot']}\n"
-            news_content = "\n".join(state.get("results", []))
-            prompt = f"""
+            if state.get("intent") == EDUCATIONAL:
+                # Evergreen question: no news was retrieved, answer from general knowledge
+                prompt = f"""
+    You are a financial educator. Here is the conversation so far:
+    {history}
+
+    --- User Query ---
+    {state['query']}
+
+    Please provide a clear, informative explanation based on your knowledge.
+    """
+            else:
+                news_content = "\n\n".join(state.get("results", []))
+                prompt = f"""
     You are a financial news assistant. Here is the conversation so far:
     {history}
 
@@ -82,31 +267,149 @@ def generate_response(state: ChatState):
     Please provide a clear, informative response using the available news information and conversation history. if no information is avaiable , you can act as financial educator and answer the query based on your knowledge.
     """
             
-            llm = ChatGroq(model_name=settings.LLM_MODEL)
-            response_obj = llm.invoke(prompt)
-            # Ensure response is a string
-            response_str = response_obj.content if hasattr(response_obj, "content") else str(response_obj)
-            state["response"] = response_str
-            logger.info("Generated response for user query using ChatGroq.")
+            try:
+                state["response"] = llm_invoke(prompt, name="respond")
+                hot_logger.info("Generated response for user query using ChatGroq.")
+            except LLMUnavailable as e:
+                # Bounded latency: answer from the retrieved news instead of waiting on the LLM
+                logger.warning("LLM unavailable, answering extractively: %s", e)
+                state["response"] = extractive_answer(state["query"], state.get("documents") or []) or (
+                    "I apologize, but I'm experiencing technical difficulties. Please try again in a moment."
+                )
+                state["fallback"] = True
            
             return state
     except Exception as e:
-            logger.error(f"Error generating response: {str(e)}")
+            logger.error("Error generating response: %s", e)
             state["response"] = "I apologize, but I'm experiencing technical difficulties. Please try again in a moment."
+            return state
             
 
-def build_graph():
+def answer_batch(states: List[ChatState], max_concurrency: int = 16) -> List[object]:
+    """
+    Answer many queries at once: retrieval for non-educational queries is done up front in bulk, then each item's
+    guardrail and generation LLM calls run concurrently. Returns the final state for
+    each item, or the exception that item raised; an empty query is a ValueError.
+    """
+    empty = {i for i, state in enumerate(states) if not (state.get("query") or "").strip()}
+    states = [state if i in empty else route_intent_node(state) for i, state in enumerate(states)]
+    prefetched = [{"results": [], "documents": []} for _ in states]
+    positions = [i for i, state in enumerate(states)
+                 if i not in empty and state["intent"] not in (EDUCATIONAL, DIGEST)]
+    try:
+        if positions:
+            batch_results = retrieve_news_batch(
+                [states[i]["query"] for i in positions],
+                symbols_per_query=[states[i]["symbols"] for i in positions]
+            )
+            for i, context in zip(positions, batch_results):
+                prefetched[i] = context
+    except Exception as e:
+        logger.error("Error retrieving news for batch: %s", e)
+        for i in positions:
+            prefetched[i] = {"results": ["Unable to retrieve relevant news at this time."], "documents": []}
+
+    def answer_one(state, context):
+        if not (state.get("query") or "").strip():
+            raise ValueError("Query cannot be empty")
+        # The guardrail runs first on every path, digests included
+        state = check_finance_related_node(state)
+        if state.get("not_related"):
+            return generate_response(state)
+        if state["intent"] == DIGEST:
+            return serve_digest_node(state)
+        state.update(context)
+        return generate_response(state)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        futures = [pool.submit(answer_one, state, context) for state, context in zip(states, prefetched)]
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result())
+        except Exception as e:
+            logger.error("Error answering batch item: %s", e)
+            outcomes.append(e)
+    return outcomes
+
+def speculative_guardrail_node(state: ChatState):
+    """Guardrail for the speculative graph; only writes the keys the guardrail owns"""
+    checked = check_finance_related_node(dict(state))
+    update = {"not_related": checked["not_related"]}
+    if checked["not_related"]:
+        update["response"] = checked["response"]
+    return update
+
+def speculative_retrieve_node(state: ChatState):
+    """Retrieval for the speculative graph; runs alongside the guardrail"""
+    retrieved = retrieve_news(dict(state))
+    return {"results": retrieved["results"], "documents": retrieved["documents"]}
+
+def speculative_retrieve_symbol_node(state: ChatState):
+    """Symbol-filtered retrieval for the speculative graph"""
+    retrieved = retrieve_symbol_news(dict(state))
+    return {"results": retrieved["results"], "documents": retrieved["documents"]}
+
+def build_speculative_graph():
+    """
+    Run the guardrail and retrieval in parallel and join them at respond.
+    Most traffic is finance-related, so retrieval latency leaves the critical path;
+    for off-topic queries the retrieved news is discarded by generate_response.
+    The local intent router runs first so educational queries never start retrieval;
+    generic news queries pass the guardrail and are then answered from a digest.
+    """
+    graph = StateGraph(ChatState)
+    graph.add_node("router", route_intent_node)
+    graph.add_node("digest_guardrail", check_finance_related_node)
+    graph.add_node("digest", serve_digest_node)
+    graph.add_node("guardrail", speculative_guardrail_node)
+    graph.add_node("retrieve", speculative_retrieve_node)
+    graph.add_node("retrieve_symbol", speculative_retrieve_symbol_node)
+    graph.add_node("respond", generate_response)
+    graph.add_edge(START, "router")
+    graph.add_conditional_edges(
+        "router",
+        lambda state: ["digest_guardrail"] if state["intent"] == DIGEST
+        else ["guardrail"] + ([_retrieval_target(state)] if _retrieval_target(state) else [])
+    )
+    graph.add_conditional_edges(
+        "digest_guardrail",
+        lambda state: ["respond"] if state.get("not_related") else ["digest"]
+    )
+    graph.add_edge("digest", END)
+    graph.add_edge("guardrail", "respond")
+    graph.add_edge("retrieve", "respond")
+    graph.add_edge("retrieve_symbol", "respond")
+    graph.add_edge("respond", END)
+    return graph.compile()
+
+def build_graph(speculative: Optional[bool] = None):
+    if speculative is None:
+        speculative = settings.SPECULATIVE_RETRIEVAL
+    if speculative:
+        logger.info("Building chat graph with speculative parallel retrieval")
+        return build_speculative_graph()
     graph = StateGraph(ChatState)
     graph.add_node("guardrail", check_finance_related_node)
+    graph.add_node("router", route_intent_node)
     graph.add_node("retrieve", retrieve_news)
+    graph.add_node("retrieve_symbol", retrieve_symbol_news)
+    graph.add_node("digest", serve_digest_node)
     graph.add_node("respond", generate_response)
     graph.set_entry_point("guardrail")
-    # If related, continue to retrieve news; if not, go directly to respond
-    
+    # If not related, go directly to respond; otherwise the local router picks the path
     graph.add_conditional_edges(
         "guardrail",
-        lambda state: ["respond"] if state.get("not_related") else ["retrieve"]
+        lambda state: ["respond"] if state.get("not_related") else ["router"]
+    )
+    # Generic news queries are served from a digest; educational queries skip retrieval;
+    # symbol queries use the symbol index
+    graph.add_conditional_edges(
+        "router",
+        lambda state: ["digest"] if state["intent"] == DIGEST else [_retrieval_target(state) or "respond"]
     )
+    graph.add_edge("digest", END)
     graph.add_edge("retrieve", "respond")
+    graph.add_edge("retrieve_symbol", "respond")
     graph.add_edge("respond", END)
     return graph.compile()
@@ -4,12 +4,84 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Settings:
-    CHROMA_PATH = "/mnt/chroma-data"
+    CHROMA_PATH = os.getenv("CHROMA_PATH", "/mnt/chroma-data")
     LOG_LEVEL = "INFO"
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_HOT_RATE = float(os.getenv("LOG_HOT_RATE", "5"))  # records/second per hot-path call site
+    LOG_HOT_SAMPLE = float(os.getenv("LOG_HOT_SAMPLE", "0.01"))  # fraction kept beyond the rate
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
     MARKETAUX_API_KEY = os.getenv("MARKETAUX_API_KEY", "")
+    MARKETAUX_BASE_URL = os.getenv("MARKETAUX_BASE_URL", "https://api.marketaux.com/v1")
+    RSS_FEED_OVERRIDE = os.getenv("RSS_FEED_OVERRIDE", "")  # replaces every configured RSS feed (load tests)
     LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
     EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))  # HTTP timeout of each Groq request
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "0"))
+    LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "12"))  # answer generation
+    LLM_GUARDRAIL_DEADLINE_SECONDS = float(os.getenv("LLM_GUARDRAIL_DEADLINE_SECONDS", "3"))
+    LLM_HEDGE = os.getenv("LLM_HEDGE", "true").lower() in ("1", "true", "yes")
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+    LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+    LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "32"))
+    EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")  # torch | onnx | onnx-int8
+    EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))  # 0 = library default
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+    EMBED_ONNX_INT8_FILE = os.getenv("EMBED_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+    EMBED_PARITY_CHECK = os.getenv("EMBED_PARITY_CHECK", "false").lower() in ("1", "true", "yes")
+    EMBED_PARITY_TOLERANCE = float(os.getenv("EMBED_PARITY_TOLERANCE", "0.02"))
+    EMBED_SERVER_URL = os.getenv("EMBED_SERVER_URL", "")  # e.g. http://127.0.0.1:8500; empty = load the model in-process
+    EMBED_SERVER_HOST = os.getenv("EMBED_SERVER_HOST", "127.0.0.1")
+    EMBED_SERVER_PORT = int(os.getenv("EMBED_SERVER_PORT", "8500"))
+    EMBED_SERVER_MAX_BATCH = int(os.getenv("EMBED_SERVER_MAX_BATCH", "64"))
+    EMBED_SERVER_MAX_WAIT_MS = float(os.getenv("EMBED_SERVER_MAX_WAIT_MS", "5"))  # how long a batch waits for more callers
+    EMBED_SERVER_TIMEOUT_SECONDS = float(os.getenv("EMBED_SERVER_TIMEOUT_SECONDS", "60"))
+    EMBED_SERVER_FALLBACK = os.getenv("EMBED_SERVER_FALLBACK", "true").lower() in ("1", "true", "yes")
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "32"))
+    INGEST_LEDGER_PATH = os.getenv("INGEST_LEDGER_PATH", os.path.join(CHROMA_PATH, "ingest_ledger.sqlite3"))
+    INGEST_MAX_RESUMES = int(os.getenv("INGEST_MAX_RESUMES", "3"))
+    TRIAGE_ENABLED = os.getenv("TRIAGE_ENABLED", "true").lower() in ("1", "true", "yes")
+    TRIAGE_TITLE_SIMILARITY = float(os.getenv("TRIAGE_TITLE_SIMILARITY", "0.8"))  # Jaccard over headline words
+    TRIAGE_MIN_FINANCE_SCORE = float(os.getenv("TRIAGE_MIN_FINANCE_SCORE", "0.3"))
+    TRIAGE_RECENT_TITLES = int(os.getenv("TRIAGE_RECENT_TITLES", "5000"))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("logs", "profiles"))
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_HEADER_TOKEN = os.getenv("PROFILE_HEADER_TOKEN", "")  # X-Profile must carry this value; empty = header ignored
+    PROFILE_JOBS = [j.strip() for j in os.getenv("PROFILE_JOBS", "").split(",") if j.strip()]
+    SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "false").lower() in ("1", "true", "yes")
+    CHROMA_KEEP_VERSIONS = int(os.getenv("CHROMA_KEEP_VERSIONS", "3"))
+    CHROMA_VERSION_CHECK_SECONDS = float(os.getenv("CHROMA_VERSION_CHECK_SECONDS", "5"))
+    CHROMA_HNSW_SPACE = os.getenv("CHROMA_HNSW_SPACE", "cosine")  # l2 | cosine | ip
+    CHROMA_HNSW_M = int(os.getenv("CHROMA_HNSW_M", "16"))
+    CHROMA_HNSW_CONSTRUCTION_EF = int(os.getenv("CHROMA_HNSW_CONSTRUCTION_EF", "100"))
+    CHROMA_HNSW_SEARCH_EF = int(os.getenv("CHROMA_HNSW_SEARCH_EF", "64"))
+    CHROMA_COMPACT_DELETED_RATIO = float(os.getenv("CHROMA_COMPACT_DELETED_RATIO", "0.2"))
+    CHROMA_COMPACT_BATCH_SIZE = int(os.getenv("CHROMA_COMPACT_BATCH_SIZE", "1000"))
+    SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "")  # set on a replica to serve read-only from a float16 snapshot
+    SYMBOL_INDEX_MAX_POSTINGS = int(os.getenv("SYMBOL_INDEX_MAX_POSTINGS", "2000"))
+    SYMBOL_CANDIDATE_LIMIT = int(os.getenv("SYMBOL_CANDIDATE_LIMIT", "200"))
+    SYMBOL_MIN_SIMILARITY = float(os.getenv("SYMBOL_MIN_SIMILARITY", "0.25"))
+    BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "500"))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    ADMISSION_USER_RATE = float(os.getenv("ADMISSION_USER_RATE", "0.5"))  # sustained chats per second per user_id
+    ADMISSION_USER_BURST = float(os.getenv("ADMISSION_USER_BURST", "5"))
+    # Keep MAX_CONCURRENT + QUEUE_SIZE below the server's worker threads (40 by default)
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "8"))
+    ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "24"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+    ADMISSION_MAX_USERS = int(os.getenv("ADMISSION_MAX_USERS", "10000"))  # token buckets kept in memory
+    CONTEXT_FETCH_K = int(os.getenv("CONTEXT_FETCH_K", "20"))  # candidate chunks retrieved before packing
+    CONTEXT_K = int(os.getenv("CONTEXT_K", "5"))  # chunks kept after MMR
+    CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))  # 1.0 = relevance only
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    DIGEST_MAX_HEADLINES = int(os.getenv("DIGEST_MAX_HEADLINES", "8"))
+    DIGEST_MAX_AGE_MINUTES = float(os.getenv("DIGEST_MAX_AGE_MINUTES", "180"))  # older digests are not served in chat
+    DIGEST_USE_LLM = os.getenv("DIGEST_USE_LLM", "true").lower() in ("1", "true", "yes")
+    STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "30"))  # how long /stats answers are reused
 
 settings = Settings()
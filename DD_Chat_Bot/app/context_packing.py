@@ -0,0 +1,217 @@
+# app/context_packing.py
+
+"""
+Context assembly between retrieval and generation.
+
+Retrieval over-fetches candidate chunks; packing then
+  1. picks a diverse subset with maximal marginal relevance (MMR),
+  2. collapses chunks of the same article into one block, in chunk order,
+     merging the text the splitter's overlap duplicated,
+  3. trims the blocks to a token budget, keeping each article's most
+     query-relevant sentences so every selected article stays covered.
+"""
+
+import re
+from typing import Dict, List, Optional
+import numpy as np
+
+# Rough token estimate for English text; avoids loading a tokenizer on the request path
+CHARS_PER_TOKEN = 4
+
+# Longest overlap searched for between consecutive chunks (the splitter overlaps by 150 chars)
+MAX_OVERLAP_CHARS = 400
+
+# Weight of each further sentence kept from the same article
+SAME_ARTICLE_DECAY = 0.8
+
+_sentence_split = re.compile(r"(?<=[.!?])\s+|\n+")
+_word = re.compile(r"[a-z0-9$%.]+")
+_stopwords = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "is", "are", "was", "were", "what",
+    "how", "why", "about", "with", "me", "tell", "any", "latest", "news", "it", "its", "this", "that"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def mmr_select(query_embedding, embeddings, k: int, lambda_mult: float = 0.7) -> List[int]:
+    """Indices of `k` candidates balancing relevance to the query against similarity to those already picked"""
+    if len(embeddings) == 0:
+        return []
+    matrix = _normalize(np.asarray(embeddings, dtype=np.float32))
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+    relevance = matrix @ query
+    selected = [int(np.argmax(relevance))]
+    max_similarity = matrix @ matrix[selected[0]]
+    while len(selected) < min(k, len(matrix)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        max_similarity = np.maximum(max_similarity, matrix @ matrix[best])
+    return selected
+
+
+def merge_overlap(left: str, right: str) -> str:
+    """Join two consecutive chunks, dropping the prefix of `right` that repeats the end of `left`"""
+    limit = min(len(left), len(right), MAX_OVERLAP_CHARS)
+    for size in range(limit, 20, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return f"{left}\n{right}"
+
+
+def _chunk_position(chunk_id: str) -> int:
+    try:
+        return int(chunk_id.rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+def collapse_articles(candidates: List[Dict]) -> List[Dict]:
+    """One block per article, in order of its best-ranked chunk, with chunks merged in document order"""
+    articles: Dict[str, Dict] = {}
+    for rank, candidate in enumerate(candidates):
+        metadata = candidate.get("metadata") or {}
+        article_id = metadata.get("article_id") or candidate["id"].rsplit("-", 1)[0]
+        article = articles.setdefault(article_id, {"article_id": article_id, "rank": rank, "chunks": []})
+        details = {
+            "title": metadata.get("title", ""),
+            "source": metadata.get("source", ""),
+            "link": metadata.get("link", ""),
+            "date": metadata.get("published") or metadata.get("date", "")
+        }
+        for key, value in details.items():
+            if not article.get(key):
+                article[key] = value
+        article["chunks"].append(candidate)
+    blocks = []
+    for article in sorted(articles.values(), key=lambda a: a["rank"]):
+        chunks = sorted(article.pop("chunks"), key=lambda c: _chunk_position(c["id"]))
+        text = chunks[0]["text"]
+        for previous, chunk in zip(chunks, chunks[1:]):
+            if _chunk_position(chunk["id"]) == _chunk_position(previous["id"]) + 1:
+                text = merge_overlap(text, chunk["text"])
+            else:
+                text = f"{text}\n...\n{chunk['text']}"
+        article["text"] = text
+        blocks.append(article)
+    return blocks
+
+
+def _query_terms(query: str) -> set:
+    return {w for w in _word.findall(query.lower()) if w not in _stopwords}
+
+
+def _sentence_score(sentence: str, terms: set) -> float:
+    words = set(_word.findall(sentence.lower()))
+    return len(words & terms) / (1 + len(words) ** 0.5)
+
+
+def trim_to_budget(blocks: List[Dict], query: str, budget_tokens: int) -> List[Dict]:
+    """
+    Keep whole blocks when they fit; otherwise keep the best sentences. Every block keeps its
+    best sentence first; the rest of the budget goes by relevance, with each further sentence
+    from the same article worth less, so coverage spreads across articles. Kept sentences stay
+    in their original order.
+    """
+    if sum(estimate_tokens(b["text"]) for b in blocks) <= budget_tokens:
+        return blocks
+    terms = _query_terms(query)
+    scored = []
+    for b_index, block in enumerate(blocks):
+        sentences = [s.strip() for s in _sentence_split.split(block["text"]) if s.strip()]
+        block["sentences"] = sentences
+        # Ties go to higher ranked articles and earlier sentences (titles, leads)
+        ranked = sorted(
+            ((_sentence_score(sentence, terms) + 1.0 - 0.01 * b_index - 0.001 * s_index, s_index)
+             for s_index, sentence in enumerate(sentences)),
+            reverse=True
+        )
+        for position, (score, s_index) in enumerate(ranked):
+            scored.append((position, score * SAME_ARTICLE_DECAY ** position, b_index, s_index))
+    # Each block's best sentence first, then everything else by decayed score
+    scored.sort(key=lambda x: (x[0] > 0, -x[1]))
+
+    keep = {i: set() for i in range(len(blocks))}
+    used = 0
+    for _, _, b_index, s_index in scored:
+        cost = estimate_tokens(blocks[b_index]["sentences"][s_index])
+        if used + cost > budget_tokens:
+            continue
+        keep[b_index].add(s_index)
+        used += cost
+
+    trimmed = []
+    for b_index, block in enumerate(blocks):
+        sentences = block.pop("sentences")
+        if keep[b_index]:
+            block["text"] = " ".join(sentences[i] for i in sorted(keep[b_index]))
+            trimmed.append(block)
+    return trimmed
+
+
+def pack_context(query: str, query_embedding, candidates: List[Dict], k: int = 5,
+                 budget_tokens: int = 1500, lambda_mult: float = 0.7) -> List[Dict]:
+    """
+    Select, collapse and trim retrieved chunks. Candidates are dicts with `id`, `text`,
+    `embedding` and `metadata`; returns article blocks with title, source, link, date and text.
+    """
+    if not candidates:
+        return []
+    if all(c.get("embedding") is not None for c in candidates):
+        chosen = mmr_select(query_embedding, [c["embedding"] for c in candidates], k, lambda_mult)
+        candidates = [candidates[i] for i in chosen]
+    else:
+        candidates = candidates[:k]
+    return trim_to_budget(collapse_articles(candidates), query, budget_tokens)
+
+
+def format_block(block: Dict, number: Optional[int] = None) -> str:
+    """Prompt text for one article block"""
+    prefix = f"[{number}] " if number is not None else ""
+    details = ", ".join(filter(None, [block.get("source"), block.get("date")]))
+    header = f"{prefix}{block.get('title') or 'Untitled'}" + (f" ({details})" if details else "")
+    link = f"\nLink: {block['link']}" if block.get("link") else ""
+    return f"{header}{link}\n{block['text']}"
+
+
+def extractive_answer(query: str, documents: List[Dict], max_sentences: int = 5) -> Optional[str]:
+    """
+    Answer assembled locally from packed context when the LLM is unavailable: the most
+    query-relevant sentences across articles, followed by the source links. None without context.
+    """
+    terms = _query_terms(query)
+    scored = []
+    for b_index, block in enumerate(documents):
+        for s_index, sentence in enumerate(_sentence_split.split(block.get("text", ""))):
+            sentence = re.sub(r"^(Title|Article|Summary):\s*", "", sentence.strip())
+            if len(sentence) < 40 or sentence.startswith("Source:"):
+                continue
+            score = _sentence_score(sentence, terms) - 0.01 * b_index - 0.001 * s_index
+            scored.append((score, b_index, sentence))
+    if not scored:
+        return None
+    scored.sort(key=lambda x: -x[0])
+    picked, seen = [], set()
+    for _, b_index, sentence in scored:
+        if sentence.lower() in seen:
+            continue
+        seen.add(sentence.lower())
+        picked.append((b_index, sentence))
+        if len(picked) >= max_sentences:
+            break
+    lines = ["I couldn't generate a full answer right now. Here are the most relevant points from recent news:", ""]
+    lines += [f"- {sentence} [{b_index + 1}]" for b_index, sentence in picked]
+    lines += ["", "Sources:"]
+    for b_index in sorted({b for b, _ in picked}):
+        block = documents[b_index]
+        lines.append(f"[{b_index + 1}] {block.get('title') or 'Untitled'}" + (f" - {block['link']}" if block.get("link") else ""))
+    return "\n".join(lines)
@@ -0,0 +1,200 @@
+# app/digests.py
+
+"""
+Per-topic news digests, precomputed by the scheduler after each ingestion run.
+
+Each digest holds the topic's most recent headlines and a short summary. New
+articles are merged into the previous digest, so a small polling run refreshes
+a topic without thinning it out, and only topics that received articles are
+re-summarized. The scheduler writes the staging copy, so each published version
+(and every snapshot exported from it) carries its digests; the API reads the
+active version's file and serves generic "what's happening in X" queries from it
+without retrieval or generation.
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Union
+from app.config import settings
+from app.llm import invoke as llm_invoke, LLMUnavailable
+from app.logging.logger import logger
+from app.vector_store import reader_path, staging_path
+from schema.models import TopicType
+from schema.records import ArticleRecord
+
+DIGESTS_FILE = "digests.json"
+
+# Keywords that assign an article to a topic; articles matching none keep their source's topic
+TOPIC_KEYWORDS = {
+    TopicType.CRYPTO: ["crypto", "bitcoin", "ethereum", "blockchain", "stablecoin", "token", "btc", "eth"],
+    TopicType.FOREX: ["forex", "currency", "currencies", "dollar", "euro", "yen", "exchange rate", "fx"],
+    TopicType.COMMODITIES: ["oil", "crude", "gold", "silver", "copper", "commodity", "commodities", "opec", "natural gas"],
+    TopicType.ECONOMY: ["inflation", "gdp", "fed", "federal reserve", "interest rate", "jobs report",
+                        "unemployment", "recession", "central bank", "economy", "economic", "cpi"],
+    TopicType.MARKET: ["stock", "stocks", "shares", "s&p", "nasdaq", "dow", "earnings", "ipo", "wall street", "equities"],
+}
+
+_keyword_patterns = {
+    topic: re.compile(r"\b(" + "|".join(re.escape(k) for k in keywords) + r")\b", re.IGNORECASE)
+    for topic, keywords in TOPIC_KEYWORDS.items()
+}
+
+
+def classify_topic(item: ArticleRecord) -> TopicType:
+    """Topic with the most keyword hits in the headline and summary, else the source's topic"""
+    text = f"{item.title} {item.summary}"
+    hits = {topic: len(pattern.findall(text)) for topic, pattern in _keyword_patterns.items()}
+    best = max(hits, key=hits.get)
+    if hits[best]:
+        return best
+    try:
+        return TopicType(item.topic or TopicType.GENERAL.value)
+    except ValueError:
+        return TopicType.GENERAL
+
+
+def digest_entry(item: ArticleRecord) -> Dict:
+    """The few fields of a news item a digest keeps"""
+    return {
+        "title": item.title,
+        "summary": re.sub(r"\s+", " ", re.sub(r"<[^>]+>", "", item.summary)).strip()[:400],
+        "link": item.link,
+        "source": item.source,
+        "date": item.published or item.date,
+        "topic": classify_topic(item).value
+    }
+
+
+def _extractive_summary(headlines: List[Dict], sentences: int = 3) -> str:
+    parts = []
+    for headline in headlines[:sentences]:
+        first = re.split(r"(?<=[.!?])\s+", headline["summary"] or headline["title"])[0]
+        parts.append(first)
+    return " ".join(parts)
+
+
+def summarize(topic: str, headlines: List[Dict]) -> str:
+    """One LLM call per refreshed topic; falls back to the leading sentences of the top headlines"""
+    if settings.DIGEST_USE_LLM:
+        listing = "\n".join(f"- {h['title']}: {h['summary']}" for h in headlines)
+        prompt = f"""
+You are a financial news editor. Write a brief digest (4-6 sentences) of the latest {topic} news
+based only on these headlines. Do not invent facts.
+
+{listing}
+"""
+        try:
+            # Off the request path: a long deadline and no hedging
+            text = llm_invoke(prompt, name="digest", deadline=settings.LLM_TIMEOUT_SECONDS, hedge=False)
+            if text.strip():
+                return text.strip()
+        except LLMUnavailable as e:
+            logger.warning(f"Digest summary for {topic} failed, using extractive summary: {str(e)}")
+    return _extractive_summary(headlines)
+
+
+class DigestStore:
+    """JSON file of digests keyed by topic, written by the scheduler and read by the API"""
+
+    def __init__(self, path: Union[str, Callable[[], str]], max_headlines: int = 8):
+        self._path = path
+        self.max_headlines = max_headlines
+        self._lock = threading.Lock()
+        self._digests: Dict[str, Dict] = {}
+        self._mtime = None
+
+    @property
+    def path(self) -> str:
+        return self._path() if callable(self._path) else self._path
+
+    def _maybe_reload(self):
+        """Reload the digests if another process (the scheduler) has rewritten them or a new version was published"""
+        path = self.path
+        try:
+            mtime = (path, os.path.getmtime(path))
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._digests = json.load(f)
+            self._mtime = mtime
+        except Exception as e:
+            logger.warning(f"Failed to load digests from {path}: {str(e)}")
+
+    def get(self, topic: str, max_age_minutes: Optional[float] = None) -> Optional[Dict]:
+        """Digest for a topic, or None if there is none or it is older than `max_age_minutes`"""
+        with self._lock:
+            self._maybe_reload()
+            digest = self._digests.get(topic)
+        if digest and max_age_minutes is not None:
+            age = datetime.now() - datetime.fromisoformat(digest["generated_at"])
+            if age > timedelta(minutes=max_age_minutes):
+                return None
+        return digest
+
+    def refresh(self, entries: Iterable[Dict], run_id: Optional[str] = None) -> List[str]:
+        """Merge a run's `digest_entry` headlines into the digests and rewrite the file. Returns the refreshed topics."""
+        entries = list(entries)
+        by_topic: Dict[str, List[Dict]] = {}
+        for entry in entries:
+            by_topic.setdefault(entry["topic"], []).append(entry)
+        if entries:
+            # The general digest covers every topic
+            by_topic[TopicType.GENERAL.value] = entries
+        with self._lock:
+            self._maybe_reload()
+            now = datetime.now().isoformat()
+            for topic, new in by_topic.items():
+                previous = self._digests.get(topic, {}).get("headlines", [])
+                seen = set()
+                headlines = []
+                # This run's articles first, then the previous digest's
+                for headline in new + previous:
+                    key = headline["link"] or headline["title"]
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    headlines.append(headline)
+                headlines = headlines[:self.max_headlines]
+                self._digests[topic] = {
+                    "topic": topic,
+                    "generated_at": now,
+                    "run_id": run_id,
+                    "article_count": len(new),
+                    "summary": summarize(topic, headlines),
+                    "headlines": headlines
+                }
+            self.save()
+        logger.info(f"Refreshed digests for topics: {sorted(by_topic)}")
+        return sorted(by_topic)
+
+    def save(self):
+        """Write atomically so readers never see a partial file"""
+        path = self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._digests, f)
+        os.replace(tmp, path)
+        self._mtime = (path, os.path.getmtime(path))
+
+
+def render_digest(digest: Dict) -> str:
+    """Chat answer for a digest"""
+    lines = [f"Here's the latest {digest['topic']} news digest:", "", digest["summary"], "", "Top headlines:"]
+    for headline in digest["headlines"]:
+        source = f" ({headline['source']})" if headline.get("source") else ""
+        lines.append(f"- {headline['title']}{source} {headline['link']}".rstrip())
+    return "\n".join(lines)
+
+
+# Reader (API) follows the published version; the writer (scheduler) updates staging before it is published
+digest_store = DigestStore(lambda: os.path.join(reader_path(), DIGESTS_FILE),
+                           max_headlines=settings.DIGEST_MAX_HEADLINES)
+staging_digest_store = DigestStore(lambda: os.path.join(staging_path(), DIGESTS_FILE),
+                                   max_headlines=settings.DIGEST_MAX_HEADLINES)
@@ -0,0 +1,191 @@
+# app/embedding_server.py
+
+"""
+Shared embedding service for the API and the scheduler.
+
+One process loads the model and serves it over localhost HTTP:
+
+    POST /embed    {"texts": [...], "priority": "query" | "ingest"} -> {"embeddings": [...]}
+    GET  /health
+    GET  /stats
+
+Requests from all callers are micro-batched: the worker takes the most urgent
+waiting slice, keeps collecting for up to EMBED_SERVER_MAX_WAIT_MS, and embeds up to
+EMBED_SERVER_MAX_BATCH texts in one model call. Large ingestion requests are cut
+into slices, so a chat query waits for at most one batch before it is served.
+Point the apps at it with EMBED_SERVER_URL.
+
+    python -m app.embedding_server
+"""
+
+import itertools
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from app.config import settings
+from app.embeddings import load_local_embedder
+from app.logging.logger import logger
+
+PRIORITIES = {"query": 0, "ingest": 1}
+
+
+class _Slice:
+    """Up to one batch worth of a request's texts"""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.embeddings: Optional[List[List[float]]] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Merges concurrent embed calls into batched model calls, query slices first"""
+
+    def __init__(self, embedder, max_batch: int, max_wait: float):
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {"requests": {name: 0 for name in PRIORITIES}, "texts": 0, "batches": 0, "embed_seconds": 0.0}
+        self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def embed(self, texts: List[str], priority: str = "ingest") -> List[List[float]]:
+        rank = PRIORITIES.get(priority, PRIORITIES["ingest"])
+        slices = [_Slice(texts[i:i + self.max_batch]) for i in range(0, len(texts), self.max_batch)]
+        with self._lock:
+            self.stats["requests"][priority if priority in PRIORITIES else "ingest"] += 1
+        for piece in slices:
+            self._queue.put((rank, next(self._seq), piece))
+        embeddings: List[List[float]] = []
+        for piece in slices:
+            piece.done.wait()
+            if piece.error is not None:
+                raise piece.error
+            embeddings.extend(piece.embeddings)
+        return embeddings
+
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def _collect(self) -> List[_Slice]:
+        batch = [self._queue.get()[2]]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(entry[2].texts) > self.max_batch:
+                # Keeps its place: the sequence number preserves arrival order
+                self._queue.put(entry)
+                break
+            batch.append(entry[2])
+            size += len(entry[2].texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for piece in batch for text in piece.texts]
+            started = time.perf_counter()
+            try:
+                embeddings = self.embedder.embed_documents(texts)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} texts failed: {str(e)}")
+                for piece in batch:
+                    piece.error = e
+                    piece.done.set()
+                continue
+            with self._lock:
+                self.stats["texts"] += len(texts)
+                self.stats["batches"] += 1
+                self.stats["embed_seconds"] += time.perf_counter() - started
+            offset = 0
+            for piece in batch:
+                piece.embeddings = [list(map(float, e)) for e in embeddings[offset:offset + len(piece.texts)]]
+                offset += len(piece.texts)
+                piece.done.set()
+
+    def status(self) -> Dict:
+        with self._lock:
+            stats = json.loads(json.dumps(self.stats))
+        stats["queued_slices"] = self.queued()
+        stats["avg_batch_size"] = round(stats["texts"] / stats["batches"], 2) if stats["batches"] else None
+        stats["embed_seconds"] = round(stats["embed_seconds"], 3)
+        return stats
+
+
+def make_handler(batcher: MicroBatcher):
+    class EmbedHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "healthy", "model": settings.EMBED_MODEL})
+            elif self.path == "/stats":
+                self._send(200, batcher.status())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/embed":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                texts = payload["texts"]
+                if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                    raise ValueError("texts must be a list of strings")
+            except (KeyError, ValueError) as e:
+                self._send(400, {"error": str(e)})
+                return
+            try:
+                embeddings = batcher.embed(texts, payload.get("priority", "ingest")) if texts else []
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+                return
+            self._send(200, {"embeddings": embeddings})
+
+        def log_message(self, format, *args):
+            pass
+
+    return EmbedHandler
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None):
+    """Load the model and serve embed calls until interrupted"""
+    host = host or settings.EMBED_SERVER_HOST
+    port = port or settings.EMBED_SERVER_PORT
+    batcher = MicroBatcher(
+        load_local_embedder(),
+        max_batch=settings.EMBED_SERVER_MAX_BATCH,
+        max_wait=settings.EMBED_SERVER_MAX_WAIT_MS / 1000
+    )
+    server = ThreadingHTTPServer((host, port), make_handler(batcher))
+    server.daemon_threads = True
+    logger.info(f"Embedding server for {settings.EMBED_MODEL} listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,175 @@
+# app/embeddings.py
+
+"""Embedding model construction with a configurable CPU backend, or a client for the shared embedding server"""
+
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+import numpy as np
+import requests
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+from app.config import settings
+from app.logging.logger import logger
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Representative texts for comparing a backend against the PyTorch reference
+PARITY_SAMPLES = [
+    "Federal Reserve holds interest rates steady as inflation cools",
+    "NVIDIA shares jump after record data center revenue",
+    "Oil prices slide on weaker demand outlook from China",
+    "What is a price-to-earnings ratio?",
+    "Bitcoin rallies above resistance as ETF inflows accelerate",
+]
+
+
+def _build_embedder(backend: str, threads: int = 0) -> HuggingFaceEmbeddings:
+    """Build a HuggingFaceEmbeddings instance on the requested backend"""
+    model_kwargs: Dict = {"device": "cpu"}
+    if backend in ("onnx", "onnx-int8"):
+        onnx_kwargs: Dict = {"provider": "CPUExecutionProvider"}
+        if backend == "onnx-int8":
+            onnx_kwargs["file_name"] = settings.EMBED_ONNX_INT8_FILE
+        if threads:
+            import onnxruntime
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = threads
+            onnx_kwargs["session_options"] = session_options
+        model_kwargs["backend"] = "onnx"
+        model_kwargs["model_kwargs"] = onnx_kwargs
+    elif threads:
+        import torch
+        torch.set_num_threads(threads)
+    return HuggingFaceEmbeddings(
+        model_name=settings.EMBED_MODEL,
+        model_kwargs=model_kwargs,
+        encode_kwargs={"batch_size": settings.EMBED_BATCH_SIZE}
+    )
+
+
+def check_embedding_parity(embedder, reference=None, texts: Optional[List[str]] = None,
+                           tolerance: Optional[float] = None) -> Dict:
+    """
+    Compare an embedder against the PyTorch reference model.
+    Passes when every sample's cosine distance to the reference is within tolerance,
+    i.e. vectors already in the store remain comparable with new query vectors.
+    """
+    texts = texts or PARITY_SAMPLES
+    tolerance = settings.EMBED_PARITY_TOLERANCE if tolerance is None else tolerance
+    reference = reference or _build_embedder("torch")
+    candidate = np.asarray(embedder.embed_documents(texts), dtype=np.float32)
+    expected = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    cosines = (candidate * expected).sum(axis=1) / (
+        np.linalg.norm(candidate, axis=1) * np.linalg.norm(expected, axis=1)
+    )
+    min_cosine = float(cosines.min())
+    return {
+        "samples": len(texts),
+        "min_cosine": min_cosine,
+        "max_distance": 1.0 - min_cosine,
+        "tolerance": tolerance,
+        "passed": (1.0 - min_cosine) <= tolerance,
+    }
+
+
+class RemoteEmbeddings(Embeddings):
+    """
+    Embeds through the shared embedding server (app/embedding_server.py).
+    Queries are sent with priority over document batches. If the server cannot
+    be reached and EMBED_SERVER_FALLBACK is set, the model is loaded locally instead.
+    """
+
+    def __init__(self, url: str, timeout: float, fallback: bool = True):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.fallback = fallback
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _embed(self, texts: List[str], priority: str) -> List[List[float]]:
+        if not texts:
+            return []
+        try:
+            response = self._session().post(
+                f"{self.url}/embed", json={"texts": texts, "priority": priority}, timeout=self.timeout
+            )
+        except requests.ConnectionError as e:
+            if not self.fallback:
+                raise
+            logger.warning(f"Embedding server at {self.url} unreachable, embedding locally: {str(e)}")
+            return load_local_embedder().embed_documents(texts)
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), "ingest")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query")[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Several query embeddings in one call, at query priority"""
+        return self._embed(list(texts), "query")
+
+
+def embed_queries(embedder, texts: List[str]) -> List[List[float]]:
+    """Query embeddings for a batch of queries; only the embedding server treats them differently from documents"""
+    if isinstance(embedder, RemoteEmbeddings):
+        return embedder.embed_queries(texts)
+    return embedder.embed_documents(texts)
+
+
+@lru_cache(maxsize=1)
+def get_embedder():
+    """The shared embedding server's client when EMBED_SERVER_URL is set, else the local model"""
+    if settings.EMBED_SERVER_URL:
+        logger.info(f"Using the embedding server at {settings.EMBED_SERVER_URL}")
+        return RemoteEmbeddings(
+            settings.EMBED_SERVER_URL,
+            timeout=settings.EMBED_SERVER_TIMEOUT_SECONDS,
+            fallback=settings.EMBED_SERVER_FALLBACK
+        )
+    return load_local_embedder()
+
+
+@lru_cache(maxsize=1)
+def load_local_embedder():
+    """Load the configured embedding model once per process"""
+    backend = settings.EMBED_BACKEND
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown EMBED_BACKEND '{backend}', using torch")
+        backend = "torch"
+    if backend == "torch":
+        return _build_embedder("torch", settings.EMBED_THREADS)
+
+    try:
+        embedder = _build_embedder(backend, settings.EMBED_THREADS)
+    except Exception as e:
+        # Fail loudly: a silent torch fallback would hide that the configured backend never runs
+        raise RuntimeError(
+            f"EMBED_BACKEND={backend} could not be loaded (needs onnxruntime and optimum[onnxruntime]): {str(e)}"
+        ) from e
+
+    if settings.EMBED_PARITY_CHECK:
+        reference = _build_embedder("torch", settings.EMBED_THREADS)
+        report = check_embedding_parity(embedder, reference=reference)
+        logger.info(f"Embedding parity check for {backend}: {report}")
+        if not report["passed"]:
+            logger.error(f"{backend} embeddings drift beyond tolerance, falling back to torch")
+            return reference
+    logger.info(f"Using {backend} embedding backend for {settings.EMBED_MODEL}")
+    return embedder
+
+
+if __name__ == "__main__":
+    for name in BACKENDS[1:]:
+        try:
+            print(name, check_embedding_parity(_build_embedder(name, settings.EMBED_THREADS)))
+        except Exception as e:
+            print(name, f"unavailable: {str(e)}")
@@ -0,0 +1,205 @@
+# app/index_maintenance.py
+
+"""
+Vector index health and compaction.
+
+Chroma never shrinks: deleted chunks leave tombstones in the HNSW index and
+free pages in SQLite, and old duplicate inserts stay searchable. The scheduler
+records every deletion in `compaction.json` inside the store. When deletions
+pass CHROMA_COMPACT_DELETED_RATIO of the index, it rebuilds staging into a
+fresh collection. The rebuild applies the configured HNSW parameters and drops
+duplicate chunks, and the result is published like any other update.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, Optional
+import chromadb
+from app.config import settings
+from app.logging.logger import logger
+from app.news_stats import NEWS_STATS_FILE, NewsStats, articles_from_chunks
+from app.symbol_index import SYMBOL_INDEX_FILE, SymbolIndex
+from app.vector_store import (
+    COLLECTION_NAME, REBUILD_DIR, STAGING_DIR, _staging_lock, collection_metadata, publish_staging,
+    raw_collection, release_path, staging_path
+)
+
+COMPACTION_FILE = "compaction.json"
+LATENCY_SAMPLES = 5
+
+
+def _read_compaction(path: str) -> Dict:
+    try:
+        with open(os.path.join(path, COMPACTION_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"deleted_since_rebuild": 0, "last_rebuild": None}
+
+
+def _write_compaction(path: str, state: Dict):
+    target = os.path.join(path, COMPACTION_FILE)
+    tmp = f"{target}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, target)
+
+
+def record_deletions(count: int, path: Optional[str] = None):
+    """Count chunks deleted from the store since its last rebuild"""
+    path = path or staging_path()
+    state = _read_compaction(path)
+    state["deleted_since_rebuild"] = state.get("deleted_since_rebuild", 0) + count
+    _write_compaction(path, state)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _collection(path: str):
+    """The raw chromadb collection at `path`; no embedding model is loaded"""
+    return chromadb.PersistentClient(path=path).get_collection(COLLECTION_NAME)
+
+
+def index_stats(path: str, latency_samples: int = LATENCY_SAMPLES) -> Dict:
+    """Element count, deleted ratio, on-disk size, HNSW parameters and a query latency sample"""
+    with raw_collection(path) as collection:
+        return _index_stats(collection, path, latency_samples)
+
+
+def _index_stats(collection, path: str, latency_samples: int) -> Dict:
+    count = collection.count()
+    compaction = _read_compaction(path)
+    deleted = compaction.get("deleted_since_rebuild", 0)
+    sqlite_file = os.path.join(path, "chroma.sqlite3")
+    stats = {
+        "path": path,
+        "total_documents": count,
+        "deleted_since_rebuild": deleted,
+        "deleted_ratio": round(deleted / (count + deleted), 4) if count + deleted else 0.0,
+        "last_rebuild": compaction.get("last_rebuild"),
+        "disk_bytes": _dir_size(path),
+        "sqlite_bytes": os.path.getsize(sqlite_file) if os.path.exists(sqlite_file) else 0,
+        "hnsw": {k: v for k, v in (collection.metadata or {}).items() if k.startswith("hnsw:")},
+        "query_latency_ms": None
+    }
+    if count and latency_samples:
+        # Time real queries using stored vectors as probes
+        probes = collection.get(limit=latency_samples, include=["embeddings"])["embeddings"]
+        timings = []
+        for probe in probes:
+            started = time.perf_counter()
+            collection.query(query_embeddings=[list(probe)], n_results=5, include=[])
+            timings.append((time.perf_counter() - started) * 1000)
+        stats["query_latency_ms"] = {
+            "samples": len(timings),
+            "p50": round(statistics.median(timings), 2),
+            "max": round(max(timings), 2)
+        }
+    return stats
+
+
+def rebuild_staging(batch_size: Optional[int] = None) -> Dict:
+    """
+    Copy every live chunk of staging into a fresh collection and swap it in.
+    Chunks with identical text are stored once. Returns counts of kept and dropped chunks.
+    """
+    batch_size = batch_size or settings.CHROMA_COMPACT_BATCH_SIZE
+    source_path = staging_path()
+    rebuild_path = os.path.join(settings.CHROMA_PATH, REBUILD_DIR)
+    shutil.rmtree(rebuild_path, ignore_errors=True)
+    before = _dir_size(source_path)
+
+    source = _collection(source_path)
+    target = chromadb.PersistentClient(path=rebuild_path).create_collection(
+        COLLECTION_NAME, metadata=collection_metadata()
+    )
+    seen = set()
+    kept = dropped = 0
+    dropped_ids = []
+    dropped_metadatas = []
+    kept_articles = set()
+    offset = 0
+    while True:
+        page = source.get(limit=batch_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+        if not page["ids"]:
+            break
+        offset += len(page["ids"])
+        rows = []
+        for row in zip(page["ids"], page["embeddings"], page["documents"], page["metadatas"]):
+            digest = hashlib.sha1((row[2] or "").encode("utf-8")).hexdigest()
+            if digest in seen:
+                dropped += 1
+                dropped_ids.append(row[0])
+                dropped_metadatas.append(row[3] or {})
+                continue
+            seen.add(digest)
+            rows.append(row)
+            kept_articles.add((row[3] or {}).get("article_id"))
+        if rows:
+            ids, embeddings, documents, metadatas = zip(*rows)
+            target.add(ids=list(ids), embeddings=[list(e) for e in embeddings],
+                       documents=list(documents), metadatas=list(metadatas))
+            kept += len(rows)
+
+    # Carry over the store's sidecar files (symbol index, ...)
+    for name in os.listdir(source_path):
+        full = os.path.join(source_path, name)
+        if os.path.isfile(full) and name != "chroma.sqlite3" and not os.path.exists(os.path.join(rebuild_path, name)):
+            shutil.copy2(full, rebuild_path)
+    _write_compaction(rebuild_path, {"deleted_since_rebuild": 0, "last_rebuild": datetime.now().isoformat()})
+    if dropped_ids:
+        _drop_from_sidecars(rebuild_path, dropped_ids, dropped_metadatas, kept_articles)
+
+    release_path(rebuild_path)
+    release_path(source_path)
+    old_path = os.path.join(settings.CHROMA_PATH, f"{STAGING_DIR}.old")
+    with _staging_lock:
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.replace(source_path, old_path)
+        os.replace(rebuild_path, source_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    result = {"kept": kept, "dropped_duplicates": dropped, "bytes_before": before, "bytes_after": _dir_size(source_path)}
+    logger.info(f"Rebuilt vector store staging: {result}")
+    return result
+
+
+def _drop_from_sidecars(path: str, chunk_ids, metadatas, kept_articles):
+    """Remove the chunks a rebuild dropped from the symbol index and news statistics copied into `path`"""
+    symbols = SymbolIndex(os.path.join(path, SYMBOL_INDEX_FILE))
+    symbols.remove_ids(chunk_ids)
+    symbols.save()
+    stats = NewsStats(os.path.join(path, NEWS_STATS_FILE))
+    articles = articles_from_chunks(metadatas)
+    stats.remove_articles([a for a in articles if a["article_id"] not in kept_articles])
+    stats.remove_articles([a for a in articles if a["article_id"] in kept_articles], chunks_only=True)
+    stats.save()
+
+
+def compact_if_needed(threshold: Optional[float] = None) -> Optional[Dict]:
+    """Rebuild and publish staging when enough of it has been deleted since the last rebuild"""
+    threshold = settings.CHROMA_COMPACT_DELETED_RATIO if threshold is None else threshold
+    path = staging_path()
+    with raw_collection(path) as collection:
+        count = collection.count()
+    deleted = _read_compaction(path).get("deleted_since_rebuild", 0)
+    ratio = deleted / (count + deleted) if count + deleted else 0.0
+    if ratio < threshold:
+        logger.info(f"Vector store compaction not needed (deleted ratio {ratio:.2%})")
+        return None
+    logger.info(f"Compacting vector store (deleted ratio {ratio:.2%})")
+    result = rebuild_staging()
+    publish_staging()
+    return result
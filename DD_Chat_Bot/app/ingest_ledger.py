@@ -0,0 +1,238 @@
+# app/ingest_ledger.py
+
+"""Persistent per-run ledger so interrupted ingestion runs resume where they stopped"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from app.config import settings
+from app.logging.logger import logger
+from schema.records import ArticleRecord
+
+# Article stages in pipeline order
+FETCHED = "fetched"
+EXTRACTED = "extracted"
+EMBEDDED = "embedded"
+STORED = "stored"
+
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+ABANDONED = "abandoned"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    resumes INTEGER NOT NULL DEFAULT 0,
+    batches INTEGER NOT NULL DEFAULT 0,
+    articles INTEGER NOT NULL DEFAULT 0,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS articles (
+    run_id TEXT NOT NULL,
+    article_id TEXT NOT NULL,
+    url TEXT,
+    stage TEXT NOT NULL,
+    item TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, article_id)
+);
+"""
+
+# Keep the stored article payload when a later stage doesn't provide one
+MARK_SQL = (
+    "INSERT INTO articles (run_id, article_id, url, stage, item, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(run_id, article_id) DO UPDATE SET stage = excluded.stage, "
+    "item = COALESCE(excluded.item, articles.item), updated_at = excluded.updated_at"
+)
+
+
+class IngestLedger:
+    """SQLite-backed record of which articles each run has fetched, extracted, embedded and stored"""
+
+    def __init__(self, path: str, keep_runs: int = 20, max_resumes: int = 3, mark_buffer: int = 64):
+        self.path = path
+        self.keep_runs = keep_runs
+        self.max_resumes = max_resumes
+        self.mark_buffer = mark_buffer
+        self._lock = threading.Lock()
+        self._initialized = False
+        # Stage marks not yet written; they go out with the next write, so their order is kept
+        self._pending_marks: List[Tuple] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _write_pending_marks(self, conn: sqlite3.Connection):
+        """Write buffered marks in the caller's transaction; call with the lock held"""
+        if self._pending_marks:
+            conn.executemany(MARK_SQL, self._pending_marks)
+            self._pending_marks = []
+
+    def _execute(self, sql: str, params: Iterable = ()) -> List[Tuple]:
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    self._write_pending_marks(conn)
+                    return conn.execute(sql, tuple(params)).fetchall()
+            finally:
+                conn.close()
+
+    def _executemany(self, sql: str, rows: List[Tuple]):
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    self._write_pending_marks(conn)
+                    conn.executemany(sql, rows)
+            finally:
+                conn.close()
+
+    def start_run(self) -> Tuple[str, bool]:
+        """Resume the latest unfinished run, or start a new one. Returns (run_id, resumed)."""
+        now = datetime.now().isoformat()
+        rows = self._execute(
+            "SELECT run_id, status, resumes FROM runs ORDER BY started_at DESC LIMIT 1"
+        )
+        if rows and rows[0][1] in (RUNNING, FAILED) and rows[0][2] >= self.max_resumes:
+            # Stop retrying a run that keeps failing; its stored articles stay stored
+            logger.warning(f"Abandoning ingestion run {rows[0][0]} after {rows[0][2]} resumes")
+            self.finish_run(rows[0][0], ABANDONED, error="abandoned after repeated resumes")
+        elif rows and rows[0][1] in (RUNNING, FAILED):
+            run_id = rows[0][0]
+            self._execute(
+                "UPDATE runs SET status = ?, updated_at = ?, resumes = resumes + 1, error = NULL WHERE run_id = ?",
+                (RUNNING, now, run_id)
+            )
+            logger.info(f"Resuming interrupted ingestion run {run_id}")
+            return run_id, True
+        run_id = uuid.uuid4().hex[:12]
+        self._execute(
+            "INSERT INTO runs (run_id, started_at, updated_at, status) VALUES (?, ?, ?, ?)",
+            (run_id, now, now, RUNNING)
+        )
+        self._prune()
+        return run_id, False
+
+    def mark(self, run_id: str, items: Iterable[ArticleRecord], stage: str, keep_item: bool = False):
+        """
+        Record articles reaching a stage; `keep_item` stores the article so a resume can skip re-downloading.
+        Marks are buffered and written with the next batch commit (or once `mark_buffer` accumulate).
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (run_id, item.article_id, item.link, stage,
+             json.dumps(item.to_dict()) if keep_item else None, now)
+            for item in items
+        ]
+        with self._lock:
+            self._pending_marks.extend(rows)
+            if len(self._pending_marks) < self.mark_buffer:
+                return
+            conn = self._connect()
+            try:
+                with conn:
+                    self._write_pending_marks(conn)
+            finally:
+                conn.close()
+
+    def mark_ids(self, run_id: str, article_ids: Iterable[str], stage: str):
+        now = datetime.now().isoformat()
+        rows = [(stage, now, run_id, article_id) for article_id in article_ids]
+        self._executemany(
+            "UPDATE articles SET stage = ?, updated_at = ? WHERE run_id = ? AND article_id = ?",
+            rows
+        )
+
+    def commit_batch(self, run_id: str, article_ids: List[str], chunks: int):
+        """Mark a batch's articles as stored and advance the run's counters"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    self._write_pending_marks(conn)
+                    conn.executemany(
+                        "UPDATE articles SET stage = ?, item = NULL, updated_at = ? WHERE run_id = ? AND article_id = ?",
+                        [(STORED, now, run_id, article_id) for article_id in article_ids]
+                    )
+                    conn.execute(
+                        "UPDATE runs SET batches = batches + 1, articles = articles + ?, chunks = chunks + ?, "
+                        "updated_at = ? WHERE run_id = ?",
+                        (len(article_ids), chunks, now, run_id)
+                    )
+            finally:
+                conn.close()
+
+    def stored_ids(self, run_id: str) -> Set[str]:
+        rows = self._execute(
+            "SELECT article_id FROM articles WHERE run_id = ? AND stage = ?", (run_id, STORED)
+        )
+        return {row[0] for row in rows}
+
+    def pending_items(self, run_id: str) -> Iterator[ArticleRecord]:
+        """Articles a previous attempt fetched but never stored, extracted ones first"""
+        rows = self._execute(
+            "SELECT item FROM articles WHERE run_id = ? AND stage != ? AND item IS NOT NULL "
+            "ORDER BY CASE stage WHEN ? THEN 1 ELSE 0 END, updated_at",
+            (run_id, STORED, FETCHED)
+        )
+        for (item,) in rows:
+            yield ArticleRecord.from_dict(json.loads(item))
+
+    def finish_run(self, run_id: str, status: str, error: Optional[str] = None):
+        self._execute(
+            "UPDATE runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+            (status, error, datetime.now().isoformat(), run_id)
+        )
+
+    def _prune(self):
+        """Drop article rows of old runs; run rows are kept for reporting"""
+        self._execute(
+            "DELETE FROM articles WHERE run_id NOT IN "
+            "(SELECT run_id FROM runs ORDER BY started_at DESC LIMIT ?)",
+            (self.keep_runs,)
+        )
+
+    def summary(self) -> Dict:
+        """Latest run state for health reporting"""
+        try:
+            rows = self._execute(
+                "SELECT run_id, started_at, updated_at, status, resumes, batches, articles, chunks, error "
+                "FROM runs ORDER BY started_at DESC LIMIT 1"
+            )
+            if not rows:
+                return {"last_run": None}
+            keys = ["run_id", "started_at", "updated_at", "status", "resumes", "batches", "articles", "chunks", "error"]
+            last_run = dict(zip(keys, rows[0]))
+            stages = self._execute(
+                "SELECT stage, COUNT(*) FROM articles WHERE run_id = ? GROUP BY stage", (last_run["run_id"],)
+            )
+            last_run["stages"] = {stage: count for stage, count in stages}
+            return {"last_run": last_run}
+        except Exception as e:
+            logger.error(f"Error reading ingestion ledger: {str(e)}")
+            return {"error": str(e)}
+
+
+# Global instance
+ingest_ledger = IngestLedger(
+    settings.INGEST_LEDGER_PATH, max_resumes=settings.INGEST_MAX_RESUMES, mark_buffer=settings.INGEST_BATCH_SIZE
+)
@@ -0,0 +1,285 @@
+# app/ingest_pipeline.py
+
+"""
+Streaming ingestion: fetch -> triage -> dedup -> extract -> chunk -> embed -> upsert.
+
+A producer thread fetches candidates, triages them, drops duplicates and downloads article
+texts into a bounded queue; the consumer chunks them and embeds/upserts fixed
+size batches. Memory stays flat regardless of run size. The staging store is
+published after the first batch, so new articles are searchable quickly, and
+once more when the run ends; each publish copies the whole store.
+
+Every stage is recorded in the ingestion ledger; a run that crashes or fails
+is resumed by the next one, which replays the articles it had already
+downloaded and skips the ones it had stored.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import chain
+from typing import Dict, Iterable, Set, Iterator, List, Optional
+from app.config import settings
+from app.digests import staging_digest_store, digest_entry
+from app.logging.logger import logger
+from app.news_fetcher import download_article_text, make_splitter, remove_article_chunks, split_article
+from app.profiling import stage
+from app.index_maintenance import compact_if_needed
+from app.ingest_ledger import ingest_ledger, FETCHED, EXTRACTED, EMBEDDED, COMPLETED, FAILED
+from app.news_stats import staging_news_stats, articles_from_chunks
+from app.scheduler_config import get_scheduler_config
+from app.source_registry import source_registry
+from app.symbol_index import staging_symbol_index
+from app.triage import triage
+from app.vector_store import open_staging_store, publish_staging
+from schema.records import ArticleRecord
+
+_DONE = object()
+
+
+def dedup(items: Iterable[ArticleRecord], skip_ids: Optional[Set[str]] = None) -> Iterator[ArticleRecord]:
+    """Drop repeated links and titles within a run, and articles already stored"""
+    seen_ids = set(skip_ids or ())
+    seen_titles = set()
+    for item in items:
+        title = item.title.lower().strip()
+        if item.article_id in seen_ids or title in seen_titles:
+            continue
+        seen_ids.add(item.article_id)
+        seen_titles.add(title)
+        yield item
+
+
+def record(items: Iterable[ArticleRecord], run_id: str, stage: str) -> Iterator[ArticleRecord]:
+    """Ledger each article as it passes a stage"""
+    for item in items:
+        ingest_ledger.mark(run_id, [item], stage, keep_item=True)
+        yield item
+
+
+def _extract(item: ArticleRecord) -> ArticleRecord:
+    if item.link and not item.content:
+        try:
+            item.content = download_article_text(item.link)
+        except Exception as e:
+            logger.warning(f"Failed to fetch article content from {item.link}: {str(e)}")
+    return item
+
+
+def extract(items: Iterable[ArticleRecord], workers: int, max_pending: int) -> Iterator[ArticleRecord]:
+    """Download article texts concurrently with at most `max_pending` in flight"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for item in items:
+            pending.add(pool.submit(_extract, item))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def _put(buffer: "queue.Queue", item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the consumer has stopped"""
+    while not stop.is_set():
+        try:
+            buffer.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(items: Iterator[ArticleRecord], buffer: "queue.Queue", errors: List[BaseException], stop: threading.Event):
+    try:
+        for item in items:
+            if not _put(buffer, item, stop):
+                return
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        _put(buffer, _DONE, stop)
+
+
+def _drain(buffer: "queue.Queue") -> Iterator[ArticleRecord]:
+    while True:
+        with stage("wait_for_extract"):
+            item = buffer.get()
+        if item is _DONE:
+            return
+        yield item
+
+
+class BatchWriter:
+    """Embeds and upserts chunks in fixed-size batches into the staging store"""
+
+    def __init__(self, batch_size: int, run_id: str):
+        self.batch_size = batch_size
+        self.run_id = run_id
+        self.vectorstore = open_staging_store()
+        self.texts: List[str] = []
+        self.metadatas: List[Dict] = []
+        self.ids: List[str] = []
+        # Articles whose chunks have all been added; they are committed with the next flush
+        self.articles: List[str] = []
+        # Articles whose first chunk is in the buffer; their previously stored chunks are deleted on flush
+        self.replacing: List[str] = []
+        self.entities: Dict[str, str] = {}
+        self.batches = 0
+        self.chunks = 0
+        # Chunks of re-ingested articles deleted from the store during this run
+        self.deleted = 0
+        self.unpublished = 0
+
+    def add(self, article_id: str, texts: List[str], chunk_ids: List[str], metadata: Dict):
+        self.replacing.append(article_id)
+        # Every chunk of an article references the same metadata dict
+        for text, chunk_id in zip(texts, chunk_ids):
+            self.texts.append(text)
+            self.metadatas.append(metadata)
+            self.ids.append(chunk_id)
+            if len(self.ids) >= self.batch_size:
+                self.flush()
+        self.articles.append(article_id)
+
+    def flush(self):
+        if not self.ids:
+            if self.articles:
+                ingest_ledger.commit_batch(self.run_id, self.articles, 0)
+                self.articles = []
+            return
+        with stage("embed"):
+            embeddings = self.vectorstore.embeddings.embed_documents(self.texts)
+        ingest_ledger.mark_ids(self.run_id, self.articles, EMBEDDED)
+        with stage("upsert"):
+            self.deleted += remove_article_chunks(self.vectorstore._collection, self.replacing)
+            self.replacing = []
+            self.vectorstore._collection.upsert(
+                ids=self.ids, embeddings=embeddings, metadatas=self.metadatas, documents=self.texts
+            )
+        by_symbol: Dict[str, List[str]] = {}
+        for metadata, chunk_id in zip(self.metadatas, self.ids):
+            for symbol in filter(None, metadata.get("symbols", "").split(",")):
+                by_symbol.setdefault(symbol, []).append(chunk_id)
+        for symbol, ids in by_symbol.items():
+            staging_symbol_index.add(ids, [symbol])
+        staging_symbol_index.add([], [], entities=self.entities)
+        staging_symbol_index.save()
+        staging_news_stats.record_articles(articles_from_chunks(self.metadatas))
+        staging_news_stats.save()
+        ingest_ledger.commit_batch(self.run_id, self.articles, len(self.ids))
+        self.articles = []
+
+        self.batches += 1
+        self.chunks += len(self.ids)
+        self.unpublished += 1
+        logger.info(f"Upserted batch {self.batches} ({len(self.ids)} chunks)")
+        self.texts, self.metadatas, self.ids = [], [], []
+        # Publish the first batch immediately; the rest is published when the run closes
+        if self.batches == 1:
+            self.publish()
+
+    def publish(self):
+        if self.unpublished:
+            with stage("publish"):
+                publish_staging()
+                # Publishing stops the staging client
+                self.vectorstore = open_staging_store()
+            self.unpublished = 0
+
+    def close(self):
+        self.flush()
+        if self.deleted:
+            # Replaced chunks bloat the index like cleanup deletions; a rebuild publishes by itself
+            with stage("compact"):
+                if compact_if_needed() is not None:
+                    self.unpublished = 0
+                    return
+        self.publish()
+
+
+def run_ingestion(candidates: Optional[Iterable[ArticleRecord]] = None) -> Dict:
+    """Stream candidates (all registered sources by default) through the pipeline and return run statistics"""
+    performance = get_scheduler_config()["performance"]
+    workers = performance["max_concurrent_fetches"]
+    started = time.time()
+
+    run_id, resumed = ingest_ledger.start_run()
+    candidates = source_registry.iter_candidates() if candidates is None else candidates
+    triaged = Counter()
+    if settings.TRIAGE_ENABLED:
+        # Drop unwanted candidates before anything is downloaded; replayed articles already passed
+        candidates = triage.filter(candidates, is_stored=staging_news_stats.contains, dropped=triaged)
+    skip_ids = None
+    if resumed:
+        # Replay what the interrupted attempt downloaded, then continue with fresh candidates
+        skip_ids = ingest_ledger.stored_ids(run_id)
+        candidates = chain(ingest_ledger.pending_items(run_id), candidates)
+    stages = record(dedup(candidates, skip_ids), run_id, FETCHED)
+    stages = record(extract(stages, workers, max_pending=workers * 2), run_id, EXTRACTED)
+
+    buffer: "queue.Queue" = queue.Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+    errors: List[BaseException] = []
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_produce,
+        args=(stages, buffer, errors, stop),
+        name="ingest-producer",
+        daemon=True
+    )
+    producer.start()
+
+    writer = BatchWriter(settings.INGEST_BATCH_SIZE, run_id)
+    splitter = make_splitter()
+    articles = 0
+    # Headlines for the topic digests; bounded so long runs keep flat memory
+    digest_items = deque(maxlen=settings.DIGEST_MAX_HEADLINES * 20)
+    try:
+        completed = False
+        try:
+            for item in _drain(buffer):
+                writer.entities.update(item.entities or {})
+                digest_items.append(digest_entry(item))
+                with stage("chunk"):
+                    texts, chunk_ids, metadata = split_article(item, splitter)
+                writer.add(item.article_id, texts, chunk_ids, metadata)
+                articles += 1
+                if articles == 1:
+                    logger.info(f"First article reached the embedder after {time.time() - started:.1f}s")
+            if digest_items and not errors:
+                # Written to staging so the final publish below ships the digests with the version
+                try:
+                    staging_digest_store.refresh(digest_items, run_id)
+                except Exception as e:
+                    logger.error(f"Failed to refresh topic digests: {str(e)}")
+            completed = True
+        finally:
+            stop.set()
+            # After a failure the pending batch is left to the resumed run, so the original error surfaces
+            if completed:
+                writer.close()
+            producer.join()
+        if errors:
+            raise errors[0]
+    except BaseException as e:
+        ingest_ledger.finish_run(run_id, FAILED, error=str(e))
+        logger.error(f"Ingestion run {run_id} failed after {writer.batches} committed batches: {str(e)}")
+        raise
+    ingest_ledger.finish_run(run_id, COMPLETED)
+
+    stats = {
+        "run_id": run_id,
+        "resumed": resumed,
+        "articles": articles,
+        "chunks": writer.chunks,
+        "batches": writer.batches,
+        "triaged": dict(triaged),
+        "seconds": round(time.time() - started, 1)
+    }
+    staging_news_stats.record_run(stats)
+    staging_news_stats.save()
+    logger.info(f"Ingestion run completed: {stats}")
+    return stats
@@ -0,0 +1,88 @@
+# app/intent_router.py
+
+"""Cheap local intent classification deciding how much retrieval a query needs"""
+
+import re
+from typing import List, Optional, Tuple
+from app.symbol_index import symbol_index
+
+NEWS = "news"
+SYMBOL = "symbol"
+EDUCATIONAL = "educational"
+DIGEST = "digest"
+
+# Evergreen "explain a concept" phrasings
+EDUCATIONAL_PATTERNS = [
+    r"^\s*(what|what's|whats)\s+(is|are)\s+(a|an)\s+",
+    r"^\s*(what|what's|whats)\s+(is|are)\s+[\w/&'-]+(\s+[\w/&'-]+)?\s*\??\s*$",
+    r"^\s*what\s+does\s+.+\s+mean\b",
+    r"\b(explain|define|definition of|meaning of|stand for|stands for)\b",
+    r"\bhow\s+(does|do|is|are)\s+.+\s+(work|calculated|computed|measured)\b",
+    r"\bhow\s+to\s+(calculate|compute|read|interpret)\b",
+    r"\bdifference\s+between\b",
+    r"\b(pros and cons|advantages|disadvantages)\s+of\b",
+]
+
+# Anything time-sensitive needs fresh news even if phrased like a definition
+NEWS_MARKERS = [
+    r"\b(today|tonight|yesterday|tomorrow|now|currently|current|latest|recent|recently)\b",
+    r"\b(news|headline|headlines|update|updates|happening|happened|announced|announcement)\b",
+    r"\bthis\s+(week|month|quarter|year|morning)\b",
+    r"\b(last|past)\s+(week|month|quarter|day|few days)\b",
+    r"\b(to watch|should i|buy|sell|best|top)\b",
+    r"\b(earnings|outlook|forecast|guidance|rally|selloff|sell-off|crash|surge|plunge)\b",
+    r"\b(19|20)\d{2}\b",
+]
+
+# Generic "what's happening" queries answered from a precomputed topic digest:
+# every word must be filler, a news word or a topic word, and a news word is required
+DIGEST_NEWS_WORDS = {
+    "news", "headlines", "happening", "latest", "updates", "update", "today", "todays", "digest", "summary", "recap"
+}
+DIGEST_FILLER_WORDS = {
+    "what", "whats", "what's", "is", "are", "the", "in", "on", "with", "any", "some", "me", "tell", "give",
+    "show", "of", "for", "this", "morning", "now", "there", "a", "an", "going", "new", "please", "today's",
+    "s", "world", "overall", "general", "quick", "recent", "current", "up", "how", "did", "do", "does"
+}
+DIGEST_TOPIC_WORDS = {
+    "market": "market", "markets": "market", "stock": "market", "stocks": "market", "wall": "market",
+    "street": "market", "equities": "market",
+    "economy": "economy", "economic": "economy", "macro": "economy",
+    "crypto": "crypto", "cryptocurrency": "crypto", "cryptocurrencies": "crypto",
+    "forex": "forex", "fx": "forex", "currency": "forex", "currencies": "forex",
+    "commodities": "commodities", "commodity": "commodities",
+    "financial": "general", "finance": "general", "business": "general"
+}
+
+_educational = [re.compile(p, re.IGNORECASE) for p in EDUCATIONAL_PATTERNS]
+_news_markers = [re.compile(p, re.IGNORECASE) for p in NEWS_MARKERS]
+
+
+def match_digest_topic(query: str) -> Optional[str]:
+    """Topic of a generic news query ("any crypto news today"), or None if the query asks for anything more specific"""
+    words = re.findall(r"[a-z']+", query.lower())
+    if not words or not any(w in DIGEST_NEWS_WORDS for w in words):
+        return None
+    topics = set()
+    for word in words:
+        if word in DIGEST_TOPIC_WORDS:
+            topics.add(DIGEST_TOPIC_WORDS[word])
+        elif word not in DIGEST_NEWS_WORDS and word not in DIGEST_FILLER_WORDS:
+            return None
+    specific = topics - {"general"}
+    if len(specific) > 1:
+        return None
+    return specific.pop() if specific else "general"
+
+
+def classify_intent(query: str) -> Tuple[str, List[str]]:
+    """
+    Classify a query as symbol-specific, educational or news-dependent.
+    Returns the intent and any symbols found in the query.
+    """
+    symbols = symbol_index.extract_symbols(query)
+    if symbols:
+        return SYMBOL, symbols
+    if any(p.search(query) for p in _educational) and not any(p.search(query) for p in _news_markers):
+        return EDUCATIONAL, []
+    return NEWS, []
@@ -0,0 +1,195 @@
+# app/llm.py
+
+"""
+LLM calls with bounded latency.
+
+`invoke(prompt, name)` runs the call on a shared worker pool and waits at most
+a deadline. If the call is still running after the recent p95 (per call name),
+a second, hedged request is sent and whichever answers first wins. Repeated
+failures or timeouts open a circuit breaker, so a degraded provider fails
+fast instead of holding every request until its deadline. Callers catch
+`LLMUnavailable` and fall back to a local answer.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+from typing import Dict, Optional
+from langchain_groq import ChatGroq
+from app.config import settings
+from app.logging.logger import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LLMUnavailable(Exception):
+    """No answer before the deadline, or the circuit breaker is open"""
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; lets one trial call through after `cooldown` seconds"""
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def release_trial(self):
+        """A half-open trial that never reached the provider: wait another cooldown before the next one"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"LLM circuit breaker opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+@lru_cache(maxsize=1)
+def get_llm() -> ChatGroq:
+    """Shared client; retries are left to hedging so the HTTP timeout stays the upper bound"""
+    return ChatGroq(
+        model_name=settings.LLM_MODEL,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+        max_retries=settings.LLM_MAX_RETRIES
+    )
+
+
+breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_COOLDOWN_SECONDS)
+_latencies: Dict[str, LatencyTracker] = {}
+_counters = {"calls": 0, "hedged": 0, "timeouts": 0, "not_started": 0, "errors": 0, "rejected": 0}
+_counter_lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=settings.LLM_MAX_WORKERS, thread_name_prefix="llm")
+
+
+def _count(key: str):
+    with _counter_lock:
+        _counters[key] += 1
+
+
+def _tracker(name: str) -> LatencyTracker:
+    with _counter_lock:
+        return _latencies.setdefault(name, LatencyTracker())
+
+
+def _call(prompt: str) -> str:
+    response_obj = get_llm().invoke(prompt)
+    return response_obj.content if hasattr(response_obj, "content") else str(response_obj)
+
+
+def invoke(prompt: str, name: str = "llm", deadline: Optional[float] = None, hedge: Optional[bool] = None) -> str:
+    """Response text, or LLMUnavailable if none arrives within `deadline` seconds"""
+    if not breaker.allow():
+        _count("rejected")
+        raise LLMUnavailable("circuit breaker open")
+    deadline = settings.LLM_DEADLINE_SECONDS if deadline is None else deadline
+    hedge = settings.LLM_HEDGE if hedge is None else hedge
+    tracker = _tracker(name)
+    hedge_after = tracker.percentile(settings.LLM_HEDGE_PERCENTILE, settings.LLM_HEDGE_MIN_SAMPLES) if hedge else None
+    _count("calls")
+
+    started = time.monotonic()
+    pending = {_pool.submit(_call, prompt): started}
+    attempts = 1
+    hedged = hedge_after is None
+    last_error: Optional[BaseException] = None
+    while True:
+        elapsed = time.monotonic() - started
+        remaining = deadline - elapsed
+        if remaining <= 0:
+            break
+        if pending:
+            timeout = remaining if hedged else min(remaining, max(0.0, hedge_after - elapsed))
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                submitted = pending.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                tracker.add(time.monotonic() - submitted)
+                breaker.record_success()
+                return text
+        if not hedged and (not pending or time.monotonic() - started >= hedge_after):
+            # Slower than usual (or the first attempt failed): race a second request
+            hedged = True
+            _count("hedged")
+            pending[_pool.submit(_call, prompt)] = time.monotonic()
+            attempts += 1
+        elif not pending:
+            break
+
+    # Drop attempts still queued for a worker so later calls don't wait behind them;
+    # running ones can't be interrupted and end at the client's HTTP timeout
+    started_attempts = attempts - sum(1 for future in pending if future.cancel())
+    if started_attempts:
+        breaker.record_failure()
+    else:
+        breaker.release_trial()
+    if pending:
+        _count("timeouts" if started_attempts else "not_started")
+        raise LLMUnavailable(f"{name} exceeded its {deadline:.1f}s deadline")
+    _count("errors")
+    raise LLMUnavailable(f"{name} failed: {last_error}")
+
+
+def llm_status() -> Dict:
+    """Breaker state, call counters and latency percentiles per call name"""
+    with _counter_lock:
+        counters = dict(_counters)
+        trackers = dict(_latencies)
+    return {
+        "breaker": breaker.state,
+        "counters": counters,
+        "latency_seconds": {
+            name: {"p50": tracker.percentile(50), "p95": tracker.percentile(95)}
+            for name, tracker in trackers.items()
+        }
+    }
@@ -1,5 +1,11 @@
+import atexit
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from app.config import settings
 import os
 
@@ -10,19 +16,124 @@ os.makedirs(LOG_DIR, exist_ok=True)  # Create folder if not exists
 # File path for logs
 LOG_FILE = os.path.join(LOG_DIR, "financial-news-bot.log")
 
+# User queries are truncated to this many characters in logs
+QUERY_LOG_CHARS = 60
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra=` fields"""
+
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without formatting them and never blocks
+    the caller: when the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Message formatting (msg % args) happens on the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class HotPathFilter(logging.Filter):
+    """
+    Rate-limits DEBUG/INFO records per call site: up to `rate` records per second
+    pass, beyond that only a `sample` fraction does. The next record that passes
+    carries the number suppressed since the last one.
+    """
+
+    def __init__(self, rate: float, sample: float):
+        super().__init__()
+        self.rate = rate
+        self.sample = sample
+        self._lock = threading.Lock()
+        self._sites = {}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, suppressed = self._sites.get(site, (self.rate, now, 0))
+            tokens = min(self.rate, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                allowed = True
+            else:
+                allowed = random.random() < self.sample
+            if allowed:
+                if suppressed:
+                    record.suppressed = suppressed
+                suppressed = 0
+            else:
+                suppressed += 1
+            self._sites[site] = (tokens, now, suppressed)
+        return allowed
+
+
+def snippet(text: str, limit: int = QUERY_LOG_CHARS) -> str:
+    """Shortened text for log lines that would otherwise carry a full user query"""
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _formatter():
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter("[%(asctime)s] %(levelname)s: %(message)s")
+
 
 logger = logging.getLogger("financial-news-bot")
 logger.setLevel(settings.LOG_LEVEL)
+logger.propagate = False
+
 # Console handler (optional, keep logs in terminal too)
 console_handler = logging.StreamHandler()
-console_formatter = logging.Formatter("[%(asctime)s] %(levelname)s: %(message)s")
-console_handler.setFormatter(console_formatter)
-logger.addHandler(console_handler)
+console_handler.setFormatter(_formatter())
 
 # File handler with daily rotation
 file_handler = TimedRotatingFileHandler(
     LOG_FILE, when="midnight", interval=1, backupCount=7, encoding="utf-8"
 )
-file_formatter = logging.Formatter("[%(asctime)s] %(levelname)s: %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+file_handler.setFormatter(_formatter())
+
+# Callers only enqueue; the listener thread formats and writes
+log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+queue_handler = NonBlockingQueueHandler(log_queue)
+logger.addHandler(queue_handler)
+listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+# For per-request/per-item lines on hot paths: same handlers, rate-limited and sampled
+hot_logger = logger.getChild("hot")
+hot_logger.addFilter(HotPathFilter(settings.LOG_HOT_RATE, settings.LOG_HOT_SAMPLE))
@@ -6,6 +6,7 @@ from typing import List, Dict, Optional, Any
 from app.logging.logger import logger
 from app.config import settings
 from newspaper import Article as NewsArticle
+from schema.records import ArticleRecord
 from datetime import datetime, timedelta
 
 class MarketAuxClient:
@@ -13,7 +14,7 @@ class MarketAuxClient:
     
     def __init__(self):
         self.api_key = settings.MARKETAUX_API_KEY
-        self.base_url = "https://api.marketaux.com/v1"
+        self.base_url = settings.MARKETAUX_BASE_URL.rstrip("/")
         
         if not self.api_key:
             logger.warning("MarketAux API key not found. MarketAux features will be disabled.")
@@ -23,7 +24,7 @@ class MarketAuxClient:
         return bool(self.api_key)
     
     def get_news_sentiment(self, symbols: List[str] = None, countries: List[str] = None, 
-                          topics: List[str] = None, limit: int = 50) -> List[Dict]:
+                          topics: List[str] = None, limit: int = 50, fetch_content: bool = True) -> List[ArticleRecord]:
         """
         Get news with sentiment analysis from MarketAux
         
@@ -32,6 +33,7 @@ class MarketAuxClient:
             countries: List of countries to filter by
             topics: List of topics to filter by
             limit: Maximum number of articles to return
+            fetch_content: Download full article texts (False leaves that to the caller)
         """
         if not self.is_available():
             logger.warning("MarketAux API not available")
@@ -59,7 +61,7 @@ class MarketAuxClient:
             
             processed_articles = []
             for article in articles:
-                processed_article = self._process_article(article)
+                processed_article = self._process_article(article, fetch_content=fetch_content)
                 if processed_article:
                     processed_articles.append(processed_article)
             
@@ -70,7 +72,7 @@ class MarketAuxClient:
             logger.error(f"Error fetching news from MarketAux: {str(e)}")
             return []
     
-    def get_news_by_symbol(self, symbol: str, limit: int = 20) -> List[Dict]:
+    def get_news_by_symbol(self, symbol: str, limit: int = 20) -> List[ArticleRecord]:
         """Get news specifically for a stock symbol"""
         return self.get_news_sentiment(symbols=[symbol], limit=limit)
     
@@ -152,7 +154,7 @@ class MarketAuxClient:
             logger.error(f"Error fetching trending topics from MarketAux: {str(e)}")
             return []
     
-    def _process_article(self, article: Dict) -> Optional[Dict]:
+    def _process_article(self, article: Dict, fetch_content: bool = True) -> Optional[ArticleRecord]:
         """Process a raw article from MarketAux API without topic or stock filtering"""
         try:
             title = article.get('title', '')
@@ -163,8 +165,15 @@ class MarketAuxClient:
             sentiment = article.get('sentiment', {})
             sentiment_score = sentiment.get('score', 0)
             sentiment_label = sentiment.get('label', 'neutral')
+
+            # Keep the tagged entities so articles can be indexed by ticker
+            entities = {}
+            for entity in article.get('entities', []) or []:
+                symbol = (entity.get('symbol') or '').strip().upper()
+                if symbol:
+                    entities[symbol] = entity.get('name', '')
             article_content = ""
-            if url:
+            if url and fetch_content:
                 try:
                     news_article = NewsArticle(url)
                     news_article.download()
@@ -173,18 +182,20 @@ class MarketAuxClient:
                 except Exception as e:
                     logger.warning(f"Failed to fetch article content from {url}: {str(e)}")
                     article_content = description  # fallback
-            processed_article = {
-                "title": title,
-                "summary": description,
-                "link": url,
-                "source": "MarketAux",
-                "date": datetime.now().isoformat(),
-                "published": published_at,
-                "sentiment_score": sentiment_score,
-                "sentiment_label": sentiment_label,
-                "api_source": "marketaux",
-                "article_content": article_content  # Always provide some content
-            }
+            processed_article = ArticleRecord(
+                title=title,
+                summary=description,
+                link=url,
+                source="MarketAux",
+                published=published_at,
+                sentiment_score=sentiment_score,
+                sentiment_label=sentiment_label,
+                api_source="marketaux",
+                symbols=entities.keys(),
+                entities=entities,
+                content=article_content,
+                language=article.get('language', '')
+            )
 
             return processed_article
 
@@ -232,19 +243,19 @@ class MarketAuxClient:
                 return {"error": "No articles found"}
             
             # Calculate sentiment statistics
-            sentiment_scores = [article.get('sentiment_score', 0) for article in articles]
+            sentiment_scores = [article.sentiment_score or 0 for article in articles]
             avg_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
             
             # Count sentiment labels
             sentiment_counts = {}
             for article in articles:
-                label = article.get('sentiment_label', 'neutral')
+                label = article.sentiment_label or 'neutral'
                 sentiment_counts[label] = sentiment_counts.get(label, 0) + 1
             
             # Get most mentioned symbols
             all_symbols = []
             for article in articles:
-                all_symbols.extend(article.get('mentioned_symbols', []))
+                all_symbols.extend(article.symbols)
             
             symbol_counts = {}
             for symbol in all_symbols:
@@ -257,7 +268,7 @@ class MarketAuxClient:
                 "average_sentiment": avg_sentiment,
                 "sentiment_distribution": sentiment_counts,
                 "top_mentioned_symbols": top_symbols,
-                "articles": articles[:10]  # Return first 10 articles
+                "articles": [article.to_dict() for article in articles[:10]]  # Return first 10 articles
             }
             
         except Exception as e:
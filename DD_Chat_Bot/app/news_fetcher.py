@@ -3,64 +3,75 @@
 import feedparser
 import requests
 from datetime import datetime
-from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 from app.logging.logger import logger
 from app.config import settings
+from app.digests import staging_digest_store, digest_entry
 from app.marketaux_client import marketaux_client
+from app.news_stats import staging_news_stats, articles_from_chunks
+from app.symbol_index import staging_symbol_index
+from app.index_maintenance import compact_if_needed, index_stats, record_deletions
+from app.vector_store import active_path, open_staging_store, publish_staging
 from newspaper import Article
+from schema.records import ArticleRecord
 
-def fetch_rss_news():
-    """Fetch all news from Yahoo Finance RSS only, including article content"""
-    sources = [
-        "https://finance.yahoo.com/news/rssindex"
-    ]
-    all_news = []
-    for url in sources:
+RSS_SOURCES = [
+    settings.RSS_FEED_OVERRIDE or "https://finance.yahoo.com/news/rssindex"
+]
+
+def download_article_text(url):
+    """Download and parse the full text of an article"""
+    article = Article(url)
+    article.download()
+    article.parse()
+    return article.text.strip()
+
+def iter_rss_entries(sources=None):
+    """Yield RSS entries as article records without downloading the article bodies"""
+    for url in sources or RSS_SOURCES:
         try:
             logger.info(f"Fetching from {url}")
             feed = feedparser.parse(url)
+            fetched_at = datetime.now().isoformat()
+            language = feed.feed.get("language", "")
             for entry in feed.entries:
                 if hasattr(entry, 'title') and hasattr(entry, 'link'):
-                    article_content = ""
-                    try:
-                        article = Article(entry.link)
-                        article.download()
-                        article.parse()
-                        article_content = article.text.strip()
-                       
-                    except Exception as e:
-                        logger.warning(f"Failed to fetch article content from {entry.link}: {str(e)}")
-                    news_item = {
-                        "title": entry.title.strip(),
-                        "summary": getattr(entry, 'summary', '').strip(),
-                        "link": getattr(entry, 'link', ''),
-                        "source": url,
-                        "date": datetime.now().isoformat(),
-                        "published": getattr(entry, 'published', ''),
-                        "author": getattr(entry, 'author', ''),
-                        "api_source": "rss",
-                        "article_content": article_content
-                    }
-                      # Debugging line, remove in production
-                    all_news.append(news_item)
+                    yield ArticleRecord(
+                        title=entry.title.strip(),
+                        summary=getattr(entry, 'summary', '').strip(),
+                        link=getattr(entry, 'link', ''),
+                        source=url,
+                        date=fetched_at,
+                        published=getattr(entry, 'published', ''),
+                        author=getattr(entry, 'author', ''),
+                        api_source="rss",
+                        language=language
+                    )
             logger.info(f"Fetched {len(feed.entries)} articles from {url}")
         except Exception as e:
             logger.error(f"Error fetching from {url}: {str(e)}")
+
+def fetch_rss_news():
+    """Fetch all news from Yahoo Finance RSS only, including article content"""
+    all_news = []
+    for news_item in iter_rss_entries():
+        try:
+            news_item.content = download_article_text(news_item.link)
+        except Exception as e:
+            logger.warning(f"Failed to fetch article content from {news_item.link}: {str(e)}")
+        all_news.append(news_item)
     return all_news
 
-def fetch_marketaux_news():
+def fetch_marketaux_news(fetch_content=True, limit=200):
     """Fetch all news from MarketAux API"""
     if not marketaux_client.is_available():
         logger.warning("MarketAux API not available, skipping MarketAux news fetch")
         return []
     try:
         logger.info("Fetching news from MarketAux...")
-        general_news = marketaux_client.get_news_sentiment(limit=200)
+        general_news = marketaux_client.get_news_sentiment(limit=limit, fetch_content=fetch_content)
         for item in general_news:
-            item["api_source"] = "marketaux"
+            item.api_source = "marketaux"
         logger.info(f"Fetched {len(general_news)} MarketAux articles")
         return general_news
     except Exception as e:
@@ -76,7 +87,7 @@ def fetch_combined_news():
     unique_news = []
     seen_titles = set()
     for item in combined_news:
-        title_lower = item["title"].lower().strip()
+        title_lower = item.title.lower().strip()
         if title_lower not in seen_titles :
             seen_titles.add(title_lower)
             #import pdb; pdb.set_trace()  # Debugging line, remove in production
@@ -88,64 +99,109 @@ def filter_and_clean_news(news_items):
     """Basic cleaning for news items"""
     filtered_news = []
     for item in news_items:
-        if len(item["summary"]) < 50:
+        if len(item.summary) < 50:
             continue
         import re
-        clean_summary = re.sub(r'<[^>]+>', '', item["summary"])
+        clean_summary = re.sub(r'<[^>]+>', '', item.summary)
         clean_summary = re.sub(r'\s+', ' ', clean_summary).strip()
-        item["summary"] = clean_summary
+        item.summary = clean_summary
         filtered_news.append(item)
     logger.info(f"Cleaned {len(filtered_news)} articles")
     return filtered_news
 
+def make_splitter():
+    return RecursiveCharacterTextSplitter(chunk_size=1200, chunk_overlap=150, length_function=len)
+
+def split_article(record: ArticleRecord, splitter):
+    """
+    Chunk an article into texts with stable `<article_id>-<n>` IDs.
+    Every chunk shares the one metadata dict returned alongside.
+    """
+    # MarketAux tags symbols; RSS items are tagged by matching known tickers/companies in the title
+    symbols = record.symbols or staging_symbol_index.extract_symbols(record.title)
+    texts = splitter.split_text(record.document_text())
+    article_id = record.article_id
+    return texts, [f"{article_id}-{i}" for i in range(len(texts))], record.chunk_metadata(symbols)
+
+
 def process_and_store(news_items):
     """Process and store all news items in the vector database"""
     if not news_items:
         logger.warning("No news items to process")
         return
-    #filtered_news = filter_and_clean_news(news_items)
-    docs = []
-    #import pdb; pdb.set_trace()
+    if settings.TRIAGE_ENABLED:
+        from app.triage import triage
+        news_items = list(triage.filter(news_items, is_stored=staging_news_stats.contains))
+    records = []
+    entities = {}
+    seen_ids = set()
     for item in news_items:
-        # Prefer article_content if available, otherwise use summary
-        article_text = item.get("article_content", "").strip()
-        if article_text:
-            content = f"Title: {item['title']}\n\nArticle: {article_text}\nSource: {item['source']}"
-        else:
-            content = f"Title: {item['title']}\n\nSummary: {item['summary']}\nSource: {item['source']}"
-        metadata = {
-            "title": item["title"],
-            "summary": item["summary"],
-            "link": item["link"],
-            "source": item["source"],
-            "date": item["date"],
-            "published": item.get("published", ""),
-            "author": item.get("author", ""),
-            "api_source": item.get("api_source", "rss"),
-            "article_content": article_text  # Store full article content in metadata
-        }
-          # Debugging line, remove in production
-        doc = Document(page_content=content, metadata=metadata)
-        docs.append(doc)
+        if item.article_id in seen_ids:
+            continue
+        seen_ids.add(item.article_id)
+        entities.update(item.entities or {})
+        records.append(item)
     try:
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1200, chunk_overlap=150, length_function=len)
-        chunks = splitter.split_documents(docs)
-        embedder = HuggingFaceEmbeddings(model_name=settings.EMBED_MODEL)
-        vectorstore = Chroma.from_documents(documents=chunks, embedding=embedder, persist_directory=settings.CHROMA_PATH)
-        vectorstore.persist()
-        logger.info(f"Stored {len(chunks)} document chunks into vector store")
+        splitter = make_splitter()
+        texts = []
+        metadatas = []
+        chunk_ids = []
+        for record in records:
+            record_texts, record_ids, metadata = split_article(record, splitter)
+            texts.extend(record_texts)
+            chunk_ids.extend(record_ids)
+            metadatas.extend([metadata] * len(record_texts))
+        vectorstore = open_staging_store()
+        deleted = remove_article_chunks(vectorstore._collection, [record.article_id for record in records])
+        vectorstore.add_texts(texts, metadatas=metadatas, ids=chunk_ids)
+        logger.info(f"Stored {len(texts)} document chunks into vector store")
+        update_symbol_index(metadatas, chunk_ids, entities)
+        staging_news_stats.record_articles(articles_from_chunks(metadatas))
+        staging_news_stats.save()
+        staging_digest_store.refresh([digest_entry(record) for record in records])
+        # Replaced chunks count toward compaction, which publishes itself when it rebuilds
+        if not deleted or compact_if_needed() is None:
+            publish_staging()
     except Exception as e:
         logger.error(f"Error processing and storing news: {str(e)}")
 
+def remove_article_chunks(collection, article_ids):
+    """
+    Delete every stored chunk of the given articles before they are re-added,
+    so an article re-ingested with fewer chunks leaves no stale ones behind.
+    The caller saves the symbol index and news statistics afterwards.
+    Returns the number of chunks deleted.
+    """
+    if not article_ids:
+        return 0
+    existing = collection.get(where={"article_id": {"$in": list(article_ids)}}, include=["metadatas"])
+    if not existing["ids"]:
+        return 0
+    collection.delete(ids=existing["ids"])
+    record_deletions(len(existing["ids"]))
+    staging_symbol_index.remove_ids(existing["ids"])
+    staging_news_stats.remove_articles(articles_from_chunks(existing["metadatas"]))
+    logger.info(f"Replaced {len(existing['ids'])} stored chunks of re-ingested articles")
+    return len(existing["ids"])
+
+def update_symbol_index(metadatas, chunk_ids, entities=None):
+    """Add stored chunks to the symbol inverted index"""
+    by_symbol = {}
+    for metadata, chunk_id in zip(metadatas, chunk_ids):
+        for symbol in filter(None, metadata.get("symbols", "").split(",")):
+            by_symbol.setdefault(symbol, []).append(chunk_id)
+    for symbol, ids in by_symbol.items():
+        staging_symbol_index.add(ids, [symbol])
+    staging_symbol_index.add([], [], entities=entities)
+    staging_symbol_index.save()
+    logger.info(f"Indexed {len(by_symbol)} symbols across {len(chunk_ids)} chunks")
+
 def get_news_statistics():
-    """Get statistics about the stored news"""
+    """Get statistics about the stored news and the health of its vector index"""
     try:
-        embedder = HuggingFaceEmbeddings(model_name=settings.EMBED_MODEL)
-        vectorstore = Chroma(persist_directory=settings.CHROMA_PATH, embedding_function=embedder)
-        collection = vectorstore._collection
-        count = collection.count()
-        logger.info(f"Vector store contains {count} documents")
-        return {"total_documents": count}
+        stats = index_stats(active_path())
+        logger.info(f"Vector store contains {stats['total_documents']} documents")
+        return stats
     except Exception as e:
         logger.error(f"Error getting news statistics: {str(e)}")
         return {"error": str(e)}
@@ -0,0 +1,240 @@
+# app/news_stats.py
+
+"""
+Incremental ingestion counters, kept next to the vector store.
+
+The scheduler updates the staging copy as batches are committed, so each
+published version carries the counters that match its contents; the API reads
+the active version's file. Nothing here opens the vector store or loads the
+embedding model.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, List, Optional, Union
+from app.config import settings
+from app.logging.logger import logger
+from app.vector_store import reader_path, staging_path
+
+NEWS_STATS_FILE = "news_stats.json"
+KEEP_DAYS = 90
+KEEP_RUNS = 20
+# Article IDs remembered so re-ingesting an article is not counted twice
+KEEP_COUNTED_IDS = 50000
+
+
+def parse_published(value: str) -> Optional[datetime]:
+    """Publish time from an RSS (RFC 822) or ISO 8601 string, as naive UTC (naive input is taken as UTC)"""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _empty() -> Dict:
+    return {
+        "totals": {"articles": 0, "chunks": 0},
+        "by_source": {},
+        "by_api_source": {},
+        "by_day": {},
+        "latest_published": None,
+        "last_ingest": None,
+        "runs": [],
+        "counted_ids": []
+    }
+
+
+def _bump(bucket: Dict, key: str, chunks: int, articles: int = 1):
+    entry = bucket.setdefault(key, {"articles": 0, "chunks": 0})
+    entry["articles"] += articles
+    entry["chunks"] += chunks
+
+
+def articles_from_chunks(metadatas: Iterable[Dict]) -> List[Dict]:
+    """Per-article summaries for `record_articles`, built from chunk metadata"""
+    articles: "OrderedDict[str, Dict]" = OrderedDict()
+    for metadata in metadatas:
+        article_id = metadata.get("article_id")
+        if not article_id:
+            continue
+        article = articles.get(article_id)
+        if article is None:
+            article = articles[article_id] = {
+                "article_id": article_id,
+                "source": metadata.get("source"),
+                "api_source": metadata.get("api_source"),
+                "published": metadata.get("published") or metadata.get("date", ""),
+                "chunks": 0
+            }
+        article["chunks"] += 1
+    return list(articles.values())
+
+
+class NewsStats:
+    """Counters per source, per api_source and per publish day (UTC), plus recent ingestion runs"""
+
+    def __init__(self, path: Union[str, Callable[[], str]]):
+        self._path = path
+        self._lock = threading.Lock()
+        self._data = _empty()
+        self._counted: "OrderedDict[str, bool]" = OrderedDict()
+        self._mtime = None
+
+    @property
+    def path(self) -> str:
+        return self._path() if callable(self._path) else self._path
+
+    def _maybe_reload(self):
+        path = self.path
+        try:
+            mtime = (path, os.path.getmtime(path))
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._data = dict(_empty(), **data)
+            self._counted = OrderedDict((i, True) for i in self._data.pop("counted_ids", []))
+            self._mtime = mtime
+        except Exception as e:
+            logger.warning(f"Failed to load news stats from {path}: {str(e)}")
+
+    def contains(self, article_id: str) -> bool:
+        """Whether the article is counted as stored"""
+        with self._lock:
+            self._maybe_reload()
+            return article_id in self._counted
+
+    def record_articles(self, articles: Iterable[Dict]):
+        """
+        Count stored articles; each dict has article_id, source, api_source, published and chunks.
+        An article already counted only adds its chunks, e.g. the rest of one split across batches.
+        """
+        with self._lock:
+            self._maybe_reload()
+            data = self._data
+            now = datetime.utcnow()
+            for article in articles:
+                new = 0 if article["article_id"] in self._counted else 1
+                self._counted[article["article_id"]] = True
+                chunks = article.get("chunks", 0)
+                published = parse_published(article.get("published", ""))
+                data["totals"]["articles"] += new
+                data["totals"]["chunks"] += chunks
+                _bump(data["by_source"], article.get("source") or "unknown", chunks, new)
+                _bump(data["by_api_source"], article.get("api_source") or "unknown", chunks, new)
+                _bump(data["by_day"], (published or now).date().isoformat(), chunks, new)
+                if published and published <= now + timedelta(hours=1):
+                    if not data["latest_published"] or published.isoformat() > data["latest_published"]:
+                        data["latest_published"] = published.isoformat()
+            while len(self._counted) > KEEP_COUNTED_IDS:
+                self._counted.popitem(last=False)
+            cutoff = (now - timedelta(days=KEEP_DAYS)).date().isoformat()
+            data["by_day"] = {day: v for day, v in data["by_day"].items() if day >= cutoff}
+            data["last_ingest"] = datetime.now().isoformat()
+
+    def remove_articles(self, articles: Iterable[Dict], chunks_only: bool = False):
+        """
+        Take deleted articles (same shape as `record_articles`) back out of the counters.
+        With `chunks_only`, only some of each article's chunks were deleted: the article stays counted.
+        """
+        with self._lock:
+            self._maybe_reload()
+            data = self._data
+            for article in articles:
+                if article["article_id"] not in self._counted:
+                    continue
+                if not chunks_only:
+                    del self._counted[article["article_id"]]
+                removed = 0 if chunks_only else 1
+                chunks = article.get("chunks", 0)
+                published = parse_published(article.get("published", ""))
+                buckets = [
+                    data["totals"],
+                    data["by_source"].get(article.get("source") or "unknown"),
+                    data["by_api_source"].get(article.get("api_source") or "unknown"),
+                    data["by_day"].get(published.date().isoformat()) if published else None
+                ]
+                for entry in filter(None, buckets):
+                    entry["articles"] = max(0, entry["articles"] - removed)
+                    entry["chunks"] = max(0, entry["chunks"] - chunks)
+
+    def record_run(self, stats: Dict):
+        """Remember a finished ingestion run for rate reporting"""
+        with self._lock:
+            self._maybe_reload()
+            runs = self._data["runs"]
+            runs.append({
+                "run_id": stats.get("run_id"),
+                "finished_at": datetime.now().isoformat(),
+                "articles": stats.get("articles", 0),
+                "chunks": stats.get("chunks", 0),
+                "seconds": stats.get("seconds", 0)
+            })
+            del runs[:-KEEP_RUNS]
+
+    def save(self):
+        """Write atomically so readers never see a partial file"""
+        with self._lock:
+            path = self.path
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            data = dict(self._data, counted_ids=list(self._counted))
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+            self._mtime = (path, os.path.getmtime(path))
+
+    def snapshot(self) -> Dict:
+        """Counters plus ingest rates derived from recent runs"""
+        with self._lock:
+            self._maybe_reload()
+            data = json.loads(json.dumps(self._data))
+        runs = data["runs"]
+        day_ago = (datetime.now() - timedelta(days=1)).isoformat()
+        recent = [r for r in runs if r["finished_at"] >= day_ago]
+        busy_seconds = sum(r["seconds"] for r in runs)
+        data["ingest_rate"] = {
+            "articles_last_24h": sum(r["articles"] for r in recent),
+            "chunks_last_24h": sum(r["chunks"] for r in recent),
+            "articles_per_minute_while_ingesting": round(
+                sum(r["articles"] for r in runs) / busy_seconds * 60, 2) if busy_seconds else None
+        }
+        data.pop("counted_ids", None)
+        return data
+
+
+_cache_lock = threading.Lock()
+_cache: Dict = {"expires": 0.0, "value": None}
+
+
+def cached_stats(build: Callable[[], Dict], ttl: Optional[float] = None) -> Dict:
+    """Serve `build()` from memory for `ttl` seconds"""
+    ttl = settings.STATS_CACHE_SECONDS if ttl is None else ttl
+    with _cache_lock:
+        if _cache["value"] is not None and time.monotonic() < _cache["expires"]:
+            return _cache["value"]
+        value = build()
+        _cache["value"] = value
+        _cache["expires"] = time.monotonic() + ttl
+        return value
+
+
+# Reader (API) follows the published version; the writer (scheduler) updates staging
+news_stats = NewsStats(lambda: os.path.join(reader_path(), NEWS_STATS_FILE))
+staging_news_stats = NewsStats(lambda: os.path.join(staging_path(), NEWS_STATS_FILE))
@@ -0,0 +1,134 @@
+# app/profiling.py
+
+"""
+Opt-in profiling for requests and scheduler jobs.
+
+`profile(name)` runs cProfile around a block and writes `<name>-<timestamp>.pstats`
+plus a `.json` per-stage timing breakdown to PROFILE_DIR. Code marks its stages
+with `stage("...")` / `@timed_stage("...")`, which cost one ContextVar lookup
+when no profile is active.
+"""
+
+import cProfile
+import hmac
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from typing import Dict, List, Optional
+from app.config import settings
+from app.logging.logger import logger
+
+_active: ContextVar[Optional["StageTimings"]] = ContextVar("active_profile", default=None)
+
+
+class StageTimings:
+    """Collects stage durations, possibly from several threads"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.events: List[Dict] = []
+
+    def add(self, name: str, start: float, duration: float):
+        with self._lock:
+            self.events.append({
+                "stage": name,
+                "offset_ms": round((start - self.started) * 1000, 3),
+                "duration_ms": round(duration * 1000, 3),
+                "thread": threading.current_thread().name
+            })
+
+    def summary(self) -> Dict[str, Dict]:
+        totals: Dict[str, Dict] = {}
+        with self._lock:
+            for event in self.events:
+                entry = totals.setdefault(event["stage"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+                entry["count"] += 1
+                entry["total_ms"] = round(entry["total_ms"] + event["duration_ms"], 3)
+                entry["max_ms"] = max(entry["max_ms"], event["duration_ms"])
+        return totals
+
+
+@contextmanager
+def stage(name: str):
+    """Time a stage of the active profile; a no-op when nothing is being profiled"""
+    timings = _active.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, start, time.perf_counter() - start)
+
+
+def timed_stage(name: str):
+    """Decorator form of `stage`"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active.get() is None:
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profile_header_allowed(value: Optional[str]) -> bool:
+    """Whether a client-supplied profiling header carries the admin token (PROFILE_HEADER_TOKEN)"""
+    token = settings.PROFILE_HEADER_TOKEN
+    return bool(token and value) and hmac.compare_digest(value.encode("utf-8"), token.encode("utf-8"))
+
+
+def should_profile(flag: Optional[str] = None, sample_rate: float = 0.0) -> bool:
+    """Profile when explicitly requested (e.g. a request header) or by random sampling"""
+    if flag and flag.strip().lower() not in ("0", "false", "no", "off"):
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+@contextmanager
+def profile(name: str, enabled: bool = True):
+    """
+    cProfile the block and record stage timings. Yields the path prefix the trace
+    will be written to, or None when disabled. cProfile only sees the calling
+    thread; stages run on other threads still appear in the timing breakdown.
+    """
+    if not enabled:
+        yield None
+        return
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)[:80]
+    prefix = os.path.join(settings.PROFILE_DIR, f"{safe_name}-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}")
+    timings = StageTimings()
+    token = _active.set(timings)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield prefix
+    finally:
+        profiler.disable()
+        _active.reset(token)
+        total_ms = round((time.perf_counter() - timings.started) * 1000, 3)
+        try:
+            profiler.dump_stats(f"{prefix}.pstats")
+            report = {
+                "name": name,
+                "total_ms": total_ms,
+                "stages": timings.summary(),
+                "events": timings.events
+            }
+            with open(f"{prefix}.json", "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            logger.info(f"Profile {name}: {total_ms:.0f} ms, stages {report['stages']}, written to {prefix}.pstats")
+        except Exception as e:
+            logger.error(f"Failed to write profile {prefix}: {str(e)}")
@@ -3,6 +3,7 @@
 """Configuration for the enhanced news scheduler"""
 
 from datetime import time
+from app.config import settings
 
 # Scheduler Configuration
 SCHEDULER_CONFIG = {
@@ -63,6 +64,13 @@ SCHEDULER_CONFIG = {
         "backup_count": 5
     },
     
+    # Opt-in job profiling (cProfile + stage timings written to logs/profiles)
+    "profiling": {
+        "enabled": False,
+        "jobs": [],            # job names, or "all"; PROFILE_JOBS in .env adds to this list
+        "sample_rate": 0.0     # profile this share of all job runs
+    },
+    
     # Error handling
     "error_handling": {
         "max_consecutive_failures": 5,
@@ -110,6 +118,53 @@ TOPIC_SCHEDULING = {
     }
 }
 
+# News source registry: each source has a topic, and may override the topic's
+# priority and max_articles_per_fetch (its per-run cap). min_interval_minutes
+# floors the adaptive polling interval, e.g. for rate-limited APIs
+NEWS_SOURCES = {
+    "yahoo_finance": {
+        "type": "rss",
+        "url": "https://finance.yahoo.com/news/rssindex",
+        "topic": "market",
+        "max_articles_per_fetch": 50,
+        "enabled": True
+    },
+    "marketaux": {
+        "type": "marketaux",
+        "topic": "market",
+        # Rate-limited API quota: keep the previous hourly cadence at most
+        "priority": "medium",
+        "min_interval_minutes": 60,
+        "max_articles_per_fetch": 200,
+        "enabled": True
+    },
+    "investing_economy": {
+        "type": "rss",
+        "url": "https://www.investing.com/rss/news_14.rss",
+        "topic": "economy",
+        "enabled": False
+    },
+    "cointelegraph": {
+        "type": "rss",
+        "url": "https://cointelegraph.com/rss",
+        "topic": "crypto",
+        "enabled": False
+    }
+}
+
+# Adaptive polling: base interval per priority, bounded adjustment from observed update rate
+SOURCE_POLLING = {
+    "base_interval_minutes": {
+        "high": 15,
+        "medium": 60,
+        "low": 180
+    },
+    "min_interval_factor": 0.25,   # never poll faster than base * factor
+    "max_interval_factor": 8,      # never poll slower than base * factor
+    "rate_smoothing": 0.3,         # EWMA weight of the latest observed update rate
+    "target_fill": 0.5             # aim to poll when about half a per-run cap of new items is expected
+}
+
 # Time-based scheduling rules
 TIME_RULES = {
     "market_hours": {
@@ -161,6 +216,19 @@ def get_topic_scheduling():
     """Get topic-specific scheduling configuration"""
     return TOPIC_SCHEDULING
 
+def get_news_sources():
+    """Get the news source registry, with RSS feeds redirected when RSS_FEED_OVERRIDE is set"""
+    if not settings.RSS_FEED_OVERRIDE:
+        return NEWS_SOURCES
+    return {
+        name: dict(source, url=settings.RSS_FEED_OVERRIDE) if source["type"] == "rss" else source
+        for name, source in NEWS_SOURCES.items()
+    }
+
+def get_source_polling():
+    """Get adaptive source polling configuration"""
+    return SOURCE_POLLING
+
 def get_time_rules():
     """Get time-based scheduling rules"""
     return TIME_RULES
@@ -0,0 +1,292 @@
+# app/snapshot.py
+
+"""
+Compact, read-only vector snapshots for replicas.
+
+A snapshot is a directory with:
+
+    manifest.json    count, dimension, model and source of the export
+    vectors.f16      float16 matrix (count x dimension), L2-normalised, memory-mapped
+    ids.txt          one chunk ID per line, in row order
+    records.jsonl    chunk text plus the small metadata retrieval needs, one line per row
+    offsets.npy      byte offset of every line in records.jsonl
+    *.json           sidecar files of the store (symbol index, news stats, ...)
+
+A replica with SNAPSHOT_PATH set serves retrieval straight from these files with
+a brute-force cosine search. The files are memory-mapped, so it is ready as soon
+as the embedding model is loaded and all workers on a host share the same pages.
+
+    python -m app.snapshot export --out /mnt/snapshots/news
+    python -m app.snapshot import /mnt/snapshots/news
+"""
+
+import argparse
+import json
+import mmap
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from app.config import settings
+from app.embeddings import get_embedder
+from app.logging.logger import logger
+from app.vector_store import active_path, open_staging_store, publish_staging, raw_collection, staging_path
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.f16"
+IDS_FILE = "ids.txt"
+RECORDS_FILE = "records.jsonl"
+OFFSETS_FILE = "offsets.npy"
+# Everything else (e.g. the full article text) stays in the Chroma store
+METADATA_KEYS = ("article_id", "symbols", "title", "summary", "link", "source", "date", "published",
+                 "author", "api_source")
+# Rows scored per step of the brute-force search, bounding the float32 working set
+SEARCH_BLOCK_ROWS = 65536
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def export_snapshot(out_dir: str, source_path: Optional[str] = None, batch_size: Optional[int] = None) -> Dict:
+    """Write the collection at `source_path` (the published version by default) as a snapshot in `out_dir`"""
+    source_path = source_path or active_path()
+    batch_size = batch_size or settings.CHROMA_COMPACT_BATCH_SIZE
+    with raw_collection(source_path) as collection:
+        count = collection.count()
+        tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        vectors = None
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        row = 0
+        with open(os.path.join(tmp_dir, IDS_FILE), "w", encoding="utf-8") as ids_file, \
+                open(os.path.join(tmp_dir, RECORDS_FILE), "wb") as records_file:
+            while row < count:
+                page = collection.get(limit=batch_size, offset=row, include=["embeddings", "documents", "metadatas"])
+                if not page["ids"]:
+                    break
+                matrix = _normalize(np.asarray(page["embeddings"], dtype=np.float32))
+                if vectors is None:
+                    vectors = np.memmap(os.path.join(tmp_dir, VECTORS_FILE), dtype=np.float16, mode="w+",
+                                        shape=(count, matrix.shape[1]))
+                vectors[row:row + len(matrix)] = matrix.astype(np.float16)
+                for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                    metadata = metadata or {}
+                    ids_file.write(f"{chunk_id}\n")
+                    line = json.dumps({"text": document or "", "metadata": {k: metadata[k] for k in METADATA_KEYS if k in metadata}})
+                    records_file.write(line.encode("utf-8") + b"\n")
+                    row += 1
+                    offsets[row] = records_file.tell()
+
+        dimension = int(vectors.shape[1]) if vectors is not None else 0
+        if vectors is not None:
+            vectors.flush()
+            del vectors
+            # Drop unused rows if the collection shrank while it was read
+            os.truncate(os.path.join(tmp_dir, VECTORS_FILE), row * dimension * 2)
+        else:
+            open(os.path.join(tmp_dir, VECTORS_FILE), "wb").close()
+        np.save(os.path.join(tmp_dir, OFFSETS_FILE), offsets[:row + 1])
+
+    for name in os.listdir(source_path):
+        full = os.path.join(source_path, name)
+        if name.endswith(".json") and os.path.isfile(full):
+            shutil.copy2(full, tmp_dir)
+    manifest = {
+        "format": FORMAT_VERSION,
+        "count": row,
+        "dimension": dimension,
+        "model": settings.EMBED_MODEL,
+        "source": source_path,
+        "created_at": datetime.now().isoformat()
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    old_dir = f"{out_dir.rstrip(os.sep)}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.isdir(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    logger.info(f"Exported {row} chunks ({dimension} dims) from {source_path} to snapshot {out_dir}")
+    return manifest
+
+
+def import_snapshot(snapshot_dir: str, batch_size: Optional[int] = None) -> int:
+    """Load a snapshot into the staging Chroma store and publish it, e.g. to turn a replica into a full store"""
+    batch_size = batch_size or settings.CHROMA_COMPACT_BATCH_SIZE
+    reader = SnapshotReader(snapshot_dir)
+    collection = open_staging_store()._collection
+    for start in range(0, reader.count_rows, batch_size):
+        rows = range(start, min(start + batch_size, reader.count_rows))
+        records = [reader.record(i) for i in rows]
+        collection.upsert(
+            ids=[reader.ids[i] for i in rows],
+            embeddings=reader.vectors[start:rows.stop].astype(np.float32).tolist(),
+            documents=[r["text"] for r in records],
+            metadatas=[r["metadata"] for r in records]
+        )
+    staging = staging_path()
+    for name in os.listdir(snapshot_dir):
+        if name.endswith(".json") and name != MANIFEST_FILE:
+            shutil.copy2(os.path.join(snapshot_dir, name), staging)
+    publish_staging()
+    logger.info(f"Imported {reader.count_rows} chunks from snapshot {snapshot_dir}")
+    reader.close()
+    return reader.count_rows
+
+
+class SnapshotReader:
+    """
+    Read-only view of a snapshot answering the subset of Chroma's collection API
+    that retrieval uses: `get(ids=..., include=...)`, `query(query_embeddings=..., n_results=..., include=...)`
+    and `count()`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.count_rows = self.manifest["count"]
+        self.dimension = self.manifest["dimension"]
+        if self.count_rows:
+            self.vectors = np.memmap(os.path.join(path, VECTORS_FILE), dtype=np.float16, mode="r",
+                                     shape=(self.count_rows, self.dimension))
+        else:
+            self.vectors = np.zeros((0, self.dimension), dtype=np.float16)
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        with open(os.path.join(path, IDS_FILE), "r", encoding="utf-8") as f:
+            self.ids = f.read().splitlines()
+        self.rows = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+        self._records_file = open(os.path.join(path, RECORDS_FILE), "rb")
+        self._records = mmap.mmap(self._records_file.fileno(), 0, access=mmap.ACCESS_READ) if self.count_rows else b""
+
+    def count(self) -> int:
+        return self.count_rows
+
+    def record(self, row: int) -> Dict:
+        return json.loads(self._records[int(self.offsets[row]):int(self.offsets[row + 1])])
+
+    def _rows_result(self, rows: List[int], include: List[str]) -> Dict:
+        result: Dict = {"ids": [self.ids[i] for i in rows]}
+        if "documents" in include or "metadatas" in include:
+            records = [self.record(i) for i in rows]
+            if "documents" in include:
+                result["documents"] = [r["text"] for r in records]
+            if "metadatas" in include:
+                result["metadatas"] = [r["metadata"] for r in records]
+        if "embeddings" in include:
+            result["embeddings"] = self.vectors[rows].astype(np.float32) if rows else np.zeros((0, self.dimension))
+        return result
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None, **_) -> Dict:
+        include = include or ["documents", "metadatas"]
+        rows = [self.rows[i] for i in ids if i in self.rows] if ids is not None else list(range(self.count_rows))
+        return self._rows_result(rows, include)
+
+    def query(self, query_embeddings, n_results: int = 10, include: Optional[List[str]] = None, **_) -> Dict:
+        """Exact cosine top-k by scanning the memory-mapped matrix in blocks"""
+        include = include if include is not None else ["documents", "metadatas", "distances"]
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+        k = min(n_results, self.count_rows)
+        if k <= 0:
+            return {key: [[] for _ in queries] for key in ["ids"] + list(include)}
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, self.count_rows, SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, start + len(block)), (len(queries), len(block)))], axis=1)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < scores.shape[1] else np.argsort(-scores, axis=1)
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_rows = np.take_along_axis(rows, top, axis=1)
+
+        result: Dict = {key: [] for key in ["ids"] + [i for i in include if i in ("documents", "metadatas", "embeddings", "distances")]}
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores)
+            ordered_rows = [int(rows[i]) for i in order]
+            hits = self._rows_result(ordered_rows, include)
+            for key in result:
+                if key == "distances":
+                    result[key].append([float(1.0 - scores[i]) for i in order])
+                else:
+                    result[key].append(hits[key])
+        return result
+
+    def close(self):
+        if self.count_rows:
+            self._records.close()
+        self._records_file.close()
+        # The vector and offset memmaps are unmapped once no longer referenced
+        self.vectors = self.offsets = None
+
+
+class SnapshotStore:
+    """Stands in for the langchain Chroma store on a replica: `embeddings` plus a read-only `_collection`"""
+
+    def __init__(self, path: str):
+        self._collection = SnapshotReader(path)
+        self.embeddings = get_embedder()
+
+
+class SnapshotHandle:
+    """Reopens the snapshot when a new export replaces it"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._store: Optional[SnapshotStore] = None
+        self._retired: Optional[SnapshotStore] = None
+        self._mtime = None
+
+    def get(self) -> SnapshotStore:
+        try:
+            mtime = os.path.getmtime(os.path.join(self.path, MANIFEST_FILE))
+        except OSError:
+            mtime = self._mtime
+        if self._store is not None and mtime == self._mtime:
+            return self._store
+        with self._lock:
+            if self._store is None or mtime != self._mtime:
+                store = SnapshotStore(self.path)
+                # Keep the previous snapshot open for requests still using it;
+                # the one before that can no longer be referenced
+                if self._retired is not None:
+                    self._retired._collection.close()
+                self._retired = self._store
+                self._store = store
+                self._mtime = mtime
+                logger.info(f"Serving read-only snapshot {self.path} ({self._store._collection.count()} chunks)")
+        return self._store
+
+
+snapshot_handle = SnapshotHandle(settings.SNAPSHOT_PATH) if settings.SNAPSHOT_PATH else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import compact vector store snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_cmd = commands.add_parser("export", help="write the published vector store as a snapshot")
+    export_cmd.add_argument("--out", default=settings.SNAPSHOT_PATH, help="snapshot directory (default: SNAPSHOT_PATH)")
+    export_cmd.add_argument("--source", default=None, help="Chroma directory (default: the published version)")
+    import_cmd = commands.add_parser("import", help="load a snapshot into the vector store and publish it")
+    import_cmd.add_argument("snapshot", help="snapshot directory")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        if not args.out:
+            parser.error("--out is required when SNAPSHOT_PATH is not set")
+        print(json.dumps(export_snapshot(args.out, args.source), indent=2))
+    else:
+        print(f"Imported {import_snapshot(args.snapshot)} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# app/source_registry.py
+
+"""Registry of news sources with adaptive, priority-driven polling"""
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+from schema.records import ArticleRecord
+from app.logging.logger import logger
+from app.news_fetcher import iter_rss_entries, fetch_marketaux_news
+from app.scheduler_config import get_news_sources, get_source_polling, get_topic_scheduling
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+SEEN_PER_SOURCE = 5000
+
+
+class SourceRegistry:
+    """
+    Tracks each configured source's cap, priority and observed update rate, and
+    keeps a priority queue of when each is next due. Sources that keep producing
+    new articles are polled more often; sources that rarely change back off.
+    """
+
+    def __init__(self, sources: Optional[Dict] = None, polling: Optional[Dict] = None,
+                 topics: Optional[Dict] = None):
+        self.polling = polling or get_source_polling()
+        topics = topics or get_topic_scheduling()
+        self.sources: Dict[str, Dict] = {}
+        for name, config in (sources or get_news_sources()).items():
+            topic = topics.get(config.get("topic", ""), {})
+            if not config.get("enabled", True) or not topic.get("enabled", True):
+                continue
+            source = dict(config)
+            source.setdefault("priority", topic.get("priority", "medium"))
+            source.setdefault("max_articles_per_fetch", topic.get("max_articles_per_fetch", 10))
+            self.sources[name] = source
+
+        self._lock = threading.Lock()
+        self._heap: List = []
+        self._state: Dict[str, Dict] = {}
+        now = time.time()
+        for name, source in self.sources.items():
+            base = max(self.polling["base_interval_minutes"][source["priority"]], source.get("min_interval_minutes", 0)) * 60
+            self._state[name] = {
+                "base_interval": base,
+                "interval": base,
+                "next_due": now,
+                "last_poll": None,
+                "last_new": 0,
+                "rate_per_hour": None,
+                "polls": 0,
+                "seen": OrderedDict()
+            }
+            heapq.heappush(self._heap, (now, PRIORITY_RANK.get(source["priority"], 1), name))
+
+    def due_sources(self, now: Optional[float] = None) -> List[str]:
+        """Pop every source whose poll is due, highest priority first"""
+        now = now or time.time()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                next_due, rank, name = heapq.heappop(self._heap)
+                state = self._state[name]
+                if next_due != state["next_due"]:
+                    continue  # stale entry, the source was rescheduled
+                due.append(name)
+                # Provisional slot so a poll that never finishes is retried later
+                self._schedule(name, now + state["interval"])
+        return due
+
+    def _schedule(self, name: str, next_due: float):
+        self._state[name]["next_due"] = next_due
+        heapq.heappush(self._heap, (next_due, PRIORITY_RANK.get(self.sources[name]["priority"], 1), name))
+
+    def _fetch(self, source: Dict) -> Iterator[ArticleRecord]:
+        if source["type"] == "rss":
+            return iter_rss_entries([source["url"]])
+        if source["type"] == "marketaux":
+            return iter(fetch_marketaux_news(fetch_content=False, limit=source["max_articles_per_fetch"]))
+        raise ValueError(f"Unknown source type: {source['type']}")
+
+    def iter_candidates(self, names: Optional[List[str]] = None) -> Iterator[ArticleRecord]:
+        """
+        Yield unseen candidates from the given sources (all by default), capped per source.
+        Sources polled less than their `min_interval_minutes` ago are skipped, whichever job asks.
+        """
+        for name in names or list(self.sources):
+            source = self.sources[name]
+            state = self._state[name]
+            floor = source.get("min_interval_minutes", 0) * 60
+            if floor and state["last_poll"] is not None and time.time() - state["last_poll"] < floor:
+                logger.info(f"Skipping {name}: polled less than {source['min_interval_minutes']} min ago")
+                continue
+            new_items = 0
+            try:
+                fresh = (item for item in self._fetch(source) if self._mark_seen(state, item))
+                for item in islice(fresh, source["max_articles_per_fetch"]):
+                    new_items += 1
+                    item.topic = item.topic or source.get("topic", "")
+                    yield item
+            except Exception as e:
+                logger.error(f"Error polling source {name}: {str(e)}")
+            self.record_poll(name, new_items)
+
+    def _mark_seen(self, state: Dict, item: ArticleRecord) -> bool:
+        article_id = item.article_id
+        seen = state["seen"]
+        if article_id in seen:
+            return False
+        seen[article_id] = True
+        if len(seen) > SEEN_PER_SOURCE:
+            seen.popitem(last=False)
+        return True
+
+    def record_poll(self, name: str, new_items: int, now: Optional[float] = None):
+        """Update the source's observed update rate and reschedule it"""
+        now = now or time.time()
+        source = self.sources[name]
+        with self._lock:
+            state = self._state[name]
+            base = state["base_interval"]
+            if state["last_poll"] is not None:
+                elapsed_hours = max((now - state["last_poll"]) / 3600, 1e-6)
+                observed = new_items / elapsed_hours
+                alpha = self.polling["rate_smoothing"]
+                previous = state["rate_per_hour"]
+                state["rate_per_hour"] = observed if previous is None else alpha * observed + (1 - alpha) * previous
+                rate = state["rate_per_hour"]
+                if rate > 0:
+                    target = max(1.0, source["max_articles_per_fetch"] * self.polling["target_fill"])
+                    interval = target / rate * 3600
+                else:
+                    interval = state["interval"] * 2
+                floor = max(base * self.polling["min_interval_factor"], source.get("min_interval_minutes", 0) * 60)
+                state["interval"] = min(max(interval, floor), max(floor, base * self.polling["max_interval_factor"]))
+            state["last_poll"] = now
+            state["last_new"] = new_items
+            state["polls"] += 1
+            self._schedule(name, now + state["interval"])
+        logger.info(f"Polled {name}: {new_items} new articles, next poll in {state['interval'] / 60:.0f} min")
+
+    def status(self) -> Dict[str, Dict]:
+        """Per-source cadence and update rate for health reporting"""
+        with self._lock:
+            return {
+                name: {
+                    "priority": self.sources[name]["priority"],
+                    "interval_minutes": round(state["interval"] / 60, 1),
+                    "rate_per_hour": None if state["rate_per_hour"] is None else round(state["rate_per_hour"], 2),
+                    "last_new": state["last_new"],
+                    "polls": state["polls"],
+                    "next_due": datetime.fromtimestamp(state["next_due"]).isoformat()
+                }
+                for name, state in self._state.items()
+            }
+
+
+# Global instance
+source_registry = SourceRegistry()
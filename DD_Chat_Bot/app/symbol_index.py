@@ -0,0 +1,151 @@
+# app/symbol_index.py
+
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Union
+from app.config import settings
+from app.logging.logger import logger
+from app.vector_store import reader_path, staging_path
+
+SYMBOL_INDEX_FILE = "symbol_index.json"
+
+# Ticker-like tokens: "$NVDA", "NVDA", "BRK.B"
+TICKER_PATTERN = re.compile(r"(?<![\w$])(\$?)([A-Z]{1,5}(?:\.[A-Z]{1,2})?)(?![\w])")
+
+# Corporate suffixes stripped from entity names before matching against queries
+NAME_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited",
+    "plc", "llc", "lp", "sa", "ag", "nv", "se", "holdings", "holding", "group", "the",
+    "class", "a", "b", "c"
+}
+
+
+def normalize_company_name(name: str) -> str:
+    """Reduce an entity name like 'NVIDIA Corporation' to a matchable key like 'nvidia'"""
+    words = re.findall(r"[a-z0-9&]+", name.lower())
+    while words and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    while words and words[0] == "the":
+        words.pop(0)
+    return " ".join(words)
+
+
+class SymbolIndex:
+    """Inverted index mapping ticker symbols to vector store chunk IDs"""
+
+    def __init__(self, path: Union[str, Callable[[], str]], max_postings: int = 2000):
+        self._path = path
+        self.max_postings = max_postings
+        self._lock = threading.Lock()
+        self._postings: Dict[str, List[str]] = {}
+        self._names: Dict[str, str] = {}
+        self._mtime = None
+
+    @property
+    def path(self) -> str:
+        """Index file location; may follow the published vector store version"""
+        return self._path() if callable(self._path) else self._path
+
+    def _maybe_reload(self):
+        """Reload the index from disk if another process (the scheduler) has rewritten it"""
+        path = self.path
+        try:
+            mtime = (path, os.path.getmtime(path))
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._postings = data.get("postings", {})
+            self._names = data.get("names", {})
+            self._mtime = mtime
+        except Exception as e:
+            logger.warning(f"Failed to load symbol index from {self.path}: {str(e)}")
+
+    def add(self, chunk_ids: Iterable[str], symbols: Iterable[str], entities: Optional[Dict[str, str]] = None):
+        """Register chunk IDs under each symbol, newest last"""
+        chunk_ids = list(chunk_ids)
+        with self._lock:
+            self._maybe_reload()
+            for symbol in symbols:
+                symbol = symbol.upper()
+                postings = self._postings.setdefault(symbol, [])
+                existing = set(postings)
+                postings.extend(cid for cid in chunk_ids if cid not in existing)
+                if len(postings) > self.max_postings:
+                    del postings[:len(postings) - self.max_postings]
+            for symbol, name in (entities or {}).items():
+                key = normalize_company_name(name or "")
+                if len(key) >= 3:
+                    self._names[key] = symbol.upper()
+
+    def remove_ids(self, chunk_ids: Iterable[str]):
+        """Drop deleted chunks from every posting list"""
+        removed = set(chunk_ids)
+        if not removed:
+            return
+        with self._lock:
+            self._maybe_reload()
+            for symbol in list(self._postings):
+                postings = [cid for cid in self._postings[symbol] if cid not in removed]
+                if postings:
+                    self._postings[symbol] = postings
+                else:
+                    del self._postings[symbol]
+
+    def lookup(self, symbols: Iterable[str], limit: Optional[int] = None) -> List[str]:
+        """Return chunk IDs mentioning any of the symbols, most recent first"""
+        with self._lock:
+            self._maybe_reload()
+            seen = set()
+            merged = []
+            for symbol in symbols:
+                for cid in reversed(self._postings.get(symbol.upper(), [])):
+                    if cid not in seen:
+                        seen.add(cid)
+                        merged.append(cid)
+        if limit is not None:
+            merged = merged[:limit]
+        return merged
+
+    def extract_symbols(self, text: str) -> List[str]:
+        """Find known tickers and company names mentioned in free text"""
+        with self._lock:
+            self._maybe_reload()
+            postings = self._postings
+            names = self._names
+        found = []
+        for dollar, token in TICKER_PATTERN.findall(text or ""):
+            # Bare one-letter tokens ("I", "A") are too ambiguous without a "$" prefix
+            if (dollar or len(token) >= 2) and token in postings and token not in found:
+                found.append(token)
+        normalized = " " + " ".join(re.findall(r"[a-z0-9&]+", (text or "").lower())) + " "
+        for name, symbol in names.items():
+            if f" {name} " in normalized and symbol not in found:
+                found.append(symbol)
+        return found
+
+    def save(self):
+        """Atomically write the index so readers never see a partial file"""
+        with self._lock:
+            path = self.path
+            data = {"postings": self._postings, "names": self._names}
+            directory = os.path.dirname(path) or "."
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+            self._mtime = (path, os.path.getmtime(path))
+        logger.info(f"Saved symbol index with {len(self._postings)} symbols to {path}")
+
+
+# Global instances: the API reads the published version, the scheduler writes to staging
+symbol_index = SymbolIndex(lambda: os.path.join(reader_path(), SYMBOL_INDEX_FILE),
+                           max_postings=settings.SYMBOL_INDEX_MAX_POSTINGS)
+staging_symbol_index = SymbolIndex(lambda: os.path.join(staging_path(), SYMBOL_INDEX_FILE),
+                                   max_postings=settings.SYMBOL_INDEX_MAX_POSTINGS)
@@ -0,0 +1,203 @@
+# app/triage.py
+
+"""
+Pre-download triage of candidate articles.
+
+Runs on the title, summary and URL only, before an article is downloaded,
+chunked or embedded. It drops:
+
+    stored       articles already in the vector store (by article ID)
+    duplicate    headlines too similar to one seen recently
+    language     items that are not in English
+    stub         video/podcast/gallery pages and items with nothing to index
+    off_topic    items a small keyword model scores as unrelated to finance
+
+Each check is a few set lookups or regexes, so the pipeline's download
+workers only see articles that will be kept.
+"""
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, Optional, Set, Tuple
+from app.config import settings
+from app.digests import TOPIC_KEYWORDS
+from app.logging.logger import logger
+from schema.records import ArticleRecord
+
+STORED = "stored"
+DUPLICATE = "duplicate"
+LANGUAGE = "language"
+STUB = "stub"
+OFF_TOPIC = "off_topic"
+
+# Pages with no article text worth indexing
+STUB_URL_PATTERN = re.compile(r"/(video|videos|podcast|podcasts|gallery|slideshow|photos|live|quote)/", re.IGNORECASE)
+MIN_SUMMARY_CHARS = 50
+
+ENGLISH_STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "with", "as", "at", "by", "from", "is",
+    "are", "was", "were", "be", "has", "have", "after", "its", "it", "this", "that", "will", "says", "said",
+    "over", "into", "than", "but", "not", "new", "more", "up", "down", "out"
+}
+TITLE_STOPWORDS = ENGLISH_STOPWORDS | {"report", "reports", "update", "breaking", "exclusive", "analysis"}
+
+# Weights of the off-topic model: finance vocabulary (including the digest topic keywords) raises
+# the score, lifestyle/sports/entertainment vocabulary lowers it
+FINANCE_WEIGHTS: Dict[str, float] = dict(
+    {keyword: 1.5 for keywords in TOPIC_KEYWORDS.values() for keyword in keywords if " " not in keyword},
+    **{word: 1.0 for word in (
+        "market", "markets", "investor", "investors", "revenue", "profit", "loss", "quarter", "quarterly",
+        "analyst", "analysts", "guidance", "bank", "banks", "bond", "bonds", "yield", "yields", "rates",
+        "tariff", "tariffs", "merger", "acquisition", "deal", "valuation", "dividend", "sales", "billion",
+        "million", "ceo", "company", "companies", "fund", "funds", "trade", "trading", "price", "prices",
+        "sec", "regulator", "debt", "tax", "budget", "demand", "supply", "growth", "forecast", "outlook",
+        "stake", "buyback", "layoffs", "startup", "funding", "index", "etf", "treasury", "mortgage"
+    )}
+)
+OFF_TOPIC_WEIGHTS: Dict[str, float] = {word: -1.5 for word in (
+    "recipe", "recipes", "horoscope", "celebrity", "celebrities", "dating", "wedding", "fashion", "beauty",
+    "workout", "diet", "football", "soccer", "nba", "nfl", "mlb", "nhl", "playoffs", "touchdown", "movie",
+    "movies", "album", "concert", "actor", "actress", "royal", "kardashian", "episode", "trailer",
+    "gardening", "pets", "puppy", "skincare", "weather", "lottery", "quiz", "crossword", "championship"
+)}
+OFF_TOPIC_BIAS = -0.5
+
+_word = re.compile(r"[a-z0-9&$']+")
+_ticker = re.compile(r"(?<![\w$])\$?[A-Z]{2,5}(?![\w])")
+
+
+def _words(text: str):
+    return _word.findall(text.lower())
+
+
+def clean_summary(summary: str) -> str:
+    """Strip HTML tags and collapse whitespace"""
+    return re.sub(r"\s+", " ", re.sub(r"<[^>]+>", "", summary or "")).strip()
+
+
+def title_signature(title: str) -> FrozenSet[str]:
+    """Content words of a headline, without a trailing " - Source" suffix"""
+    title = re.sub(r"\s+[-|–]\s+[^-|–]{1,40}$", "", title)
+    return frozenset(w for w in _words(title) if w not in TITLE_STOPWORDS and len(w) > 1)
+
+
+def is_english(item: ArticleRecord) -> bool:
+    """Declared language if any, else a stopword and character-set check on title and summary"""
+    if item.language:
+        return item.language.lower().startswith("en")
+    text = f"{item.title} {item.summary}"
+    letters = [c for c in text if c.isalpha()]
+    if letters and sum(1 for c in letters if c.isascii()) / len(letters) < 0.7:
+        return False
+    words = _words(text)
+    if len(words) < 8:
+        return True
+    return sum(1 for w in words if w in ENGLISH_STOPWORDS) / len(words) >= 0.05
+
+
+def is_stub(item: ArticleRecord) -> bool:
+    # Short headlines ("Fed holds rates") are normal news, so only the URL and missing content count
+    if STUB_URL_PATTERN.search(item.link):
+        return True
+    # Without a link there is nothing to download, so the summary is all we would index
+    return not item.link and len(item.summary) < MIN_SUMMARY_CHARS
+
+
+def finance_score(item: ArticleRecord) -> float:
+    """Probability-like relevance to finance from a bag-of-words linear model over title and summary"""
+    if item.symbols or item.entities:
+        return 1.0
+    title = item.title
+    counts = Counter(_words(f"{title} {title} {item.summary}"))
+    logit = OFF_TOPIC_BIAS + sum(
+        min(n, 3) * (FINANCE_WEIGHTS.get(w, 0.0) + OFF_TOPIC_WEIGHTS.get(w, 0.0)) for w, n in counts.items()
+    )
+    if _ticker.search(title):
+        logit += 1.0
+    return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, logit))))
+
+
+class Triage:
+    """Stateful filter; remembers recent headline signatures across runs for near-duplicate detection"""
+
+    def __init__(self, similarity: float, min_score: float, recent_titles: int = 5000):
+        self.similarity = similarity
+        self.min_score = min_score
+        self.recent_titles = recent_titles
+        self._lock = threading.Lock()
+        # key -> (article_id, signature)
+        self._titles: "OrderedDict[int, Tuple[str, FrozenSet[str]]]" = OrderedDict()
+        self._by_word: Dict[str, Set[int]] = {}
+        self._next = 0
+        self.dropped = Counter()
+
+    def _near_duplicate(self, article_id: str, signature: FrozenSet[str]) -> bool:
+        candidates: Set[int] = set()
+        for word in signature:
+            candidates |= self._by_word.get(word, set())
+        for key in candidates:
+            other_id, other = self._titles[key]
+            if other_id != article_id and len(signature & other) / len(signature | other) >= self.similarity:
+                return True
+        return False
+
+    def _remember(self, article_id: str, signature: FrozenSet[str]):
+        key = self._next
+        self._next += 1
+        self._titles[key] = (article_id, signature)
+        for word in signature:
+            self._by_word.setdefault(word, set()).add(key)
+        while len(self._titles) > self.recent_titles:
+            old_key, (_, old) = self._titles.popitem(last=False)
+            for word in old:
+                keys = self._by_word.get(word)
+                if keys is not None:
+                    keys.discard(old_key)
+                    if not keys:
+                        del self._by_word[word]
+
+    def reason(self, item: ArticleRecord, is_stored: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """Why the item should be dropped, or None to keep it"""
+        article_id = item.article_id
+        if is_stored is not None and is_stored(article_id):
+            return STORED
+        if is_stub(item):
+            return STUB
+        if not is_english(item):
+            return LANGUAGE
+        if finance_score(item) < self.min_score:
+            return OFF_TOPIC
+        signature = title_signature(item.title)
+        if signature:
+            with self._lock:
+                if self._near_duplicate(article_id, signature):
+                    return DUPLICATE
+                self._remember(article_id, signature)
+        return None
+
+    def filter(self, items: Iterable[ArticleRecord], is_stored: Optional[Callable[[str], bool]] = None,
+               dropped: Optional[Counter] = None) -> Iterator[ArticleRecord]:
+        """Yield the items worth downloading, counting drops per reason into `dropped`; summaries are cleaned on the way"""
+        dropped = Counter() if dropped is None else dropped
+        kept = 0
+        for item in items:
+            item.summary = clean_summary(item.summary)
+            reason = self.reason(item, is_stored=is_stored)
+            if reason:
+                dropped[reason] += 1
+                logger.debug(f"Triage dropped ({reason}): {item.title[:80]}")
+                continue
+            kept += 1
+            yield item
+        with self._lock:
+            self.dropped.update(dropped)
+        logger.info(f"Triage kept {kept} candidates, dropped {sum(dropped.values())} {dict(dropped)}")
+
+
+triage = Triage(
+    similarity=settings.TRIAGE_TITLE_SIMILARITY,
+    min_score=settings.TRIAGE_MIN_FINANCE_SCORE,
+    recent_titles=settings.TRIAGE_RECENT_TITLES
+)
@@ -0,0 +1,232 @@
+# app/vector_store.py
+
+"""
+Versioned vector store layout shared by the scheduler (writer) and the API (reader).
+
+    CHROMA_PATH/
+        staging/            private to the scheduler, all writes go here
+        versions/<name>/    immutable published copies
+        CURRENT             name of the published version the API should read
+
+The scheduler publishes by copying staging into a new version directory and
+atomically replacing CURRENT, so readers never open a directory being written.
+"""
+
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+import chromadb
+from langchain_community.vectorstores import Chroma
+from app.config import settings
+from app.embeddings import get_embedder
+from app.logging.logger import logger
+
+STAGING_DIR = "staging"
+VERSIONS_DIR = "versions"
+CURRENT_POINTER = "CURRENT"
+REBUILD_DIR = f"{STAGING_DIR}.rebuild"
+RESERVED_NAMES = {STAGING_DIR, VERSIONS_DIR, CURRENT_POINTER, f"{CURRENT_POINTER}.tmp", REBUILD_DIR, f"{STAGING_DIR}.old"}
+
+# langchain's default collection name, used by existing stores
+COLLECTION_NAME = "langchain"
+
+_staging_lock = threading.Lock()
+
+
+def _versions_root() -> str:
+    return os.path.join(settings.CHROMA_PATH, VERSIONS_DIR)
+
+
+def active_path() -> str:
+    """Directory of the currently published version (the legacy flat layout if none)"""
+    try:
+        with open(os.path.join(settings.CHROMA_PATH, CURRENT_POINTER), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+        if name:
+            path = os.path.join(_versions_root(), name)
+            if os.path.isdir(path):
+                return path
+    except OSError:
+        pass
+    return settings.CHROMA_PATH
+
+
+def reader_path() -> str:
+    """Directory the API reads sidecar files from: the snapshot on a read-only replica, else the published version"""
+    return settings.SNAPSHOT_PATH or active_path()
+
+
+def _ignore_reserved(directory, names):
+    return [n for n in names if n in RESERVED_NAMES] if directory == settings.CHROMA_PATH else []
+
+
+def staging_path() -> str:
+    """Writer directory, seeded from the active version on first use"""
+    path = os.path.join(settings.CHROMA_PATH, STAGING_DIR)
+    with _staging_lock:
+        if not os.path.isdir(path):
+            source = active_path()
+            if os.path.isdir(source):
+                logger.info(f"Seeding vector store staging directory from {source}")
+                shutil.copytree(source, path, ignore=_ignore_reserved)
+            else:
+                os.makedirs(path, exist_ok=True)
+    return path
+
+
+def collection_metadata() -> Dict:
+    """HNSW parameters applied when a collection is created; existing collections keep theirs until rebuilt"""
+    return {
+        "hnsw:space": settings.CHROMA_HNSW_SPACE,
+        "hnsw:M": settings.CHROMA_HNSW_M,
+        "hnsw:construction_ef": settings.CHROMA_HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": settings.CHROMA_HNSW_SEARCH_EF
+    }
+
+
+def open_store(path: str) -> Chroma:
+    """Open (or create, with the configured HNSW parameters) the collection at `path`"""
+    return Chroma(
+        collection_name=COLLECTION_NAME,
+        persist_directory=path,
+        embedding_function=get_embedder(),
+        collection_metadata=collection_metadata()
+    )
+
+
+def open_staging_store() -> Chroma:
+    """Open the writer's vector store"""
+    return open_store(staging_path())
+
+
+def publish_staging() -> str:
+    """
+    Copy staging into a new version and atomically point CURRENT at it.
+    The staging client is stopped first so the copy sees fully written files;
+    writers must reopen the staging store before writing again.
+    """
+    source = staging_path()
+    name = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    target = os.path.join(_versions_root(), name)
+    os.makedirs(_versions_root(), exist_ok=True)
+    with _staging_lock:
+        release_path(source)
+        shutil.copytree(source, target)
+
+    pointer = os.path.join(settings.CHROMA_PATH, CURRENT_POINTER)
+    tmp_pointer = f"{pointer}.tmp"
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, pointer)
+    logger.info(f"Published vector store version {name}")
+    gc_versions()
+    return target
+
+
+def list_versions() -> List[str]:
+    """Published version names, oldest first"""
+    try:
+        return sorted(n for n in os.listdir(_versions_root()) if os.path.isdir(os.path.join(_versions_root(), n)))
+    except OSError:
+        return []
+
+
+def gc_versions(keep: Optional[int] = None):
+    """Delete old versions, always keeping the active one and the newest `keep`"""
+    keep = settings.CHROMA_KEEP_VERSIONS if keep is None else keep
+    current = os.path.basename(active_path())
+    versions = list_versions()
+    for name in versions[:-keep] if keep > 0 else versions:
+        if name == current:
+            continue
+        try:
+            shutil.rmtree(os.path.join(_versions_root(), name))
+            logger.info(f"Removed old vector store version {name}")
+        except Exception as e:
+            logger.warning(f"Failed to remove vector store version {name}: {str(e)}")
+
+
+def _release_store(store: Chroma):
+    """Stop a retired Chroma client so the memory of its index is freed"""
+    try:
+        from chromadb.api.client import SharedSystemClient
+        client = store._client
+        SharedSystemClient._identifier_to_system.pop(client._identifier, None)
+        client._system.stop()
+    except Exception as e:
+        logger.warning(f"Failed to release retired vector store: {str(e)}")
+
+
+def release_path(path: str):
+    """Stop the cached Chroma system for a directory, e.g. before the directory is replaced"""
+    try:
+        from chromadb.api.client import SharedSystemClient
+        system = SharedSystemClient._identifier_to_system.pop(path, None)
+        if system is not None:
+            system.stop()
+    except Exception as e:
+        logger.warning(f"Failed to release vector store at {path}: {str(e)}")
+
+
+@contextmanager
+def raw_collection(path: str):
+    """
+    The raw chromadb collection at `path`, without loading the embedding model.
+    The client is closed afterwards so one-off reads of published versions don't stay cached.
+    """
+    from chromadb.api.client import SharedSystemClient
+    shared = path in SharedSystemClient._identifier_to_system
+    client = chromadb.PersistentClient(path=path)
+    try:
+        yield client.get_collection(COLLECTION_NAME)
+    finally:
+        if hasattr(client, "close"):
+            # Reference-counted: the system stays up while another client (e.g. the API reader) uses it
+            client.close()
+        elif not shared:
+            release_path(path)
+
+
+class VersionedVectorStore:
+    """Reader handle that hot-swaps to newly published versions between requests"""
+
+    def __init__(self, check_interval: float = 5.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._path: Optional[str] = None
+        self._store: Optional[Chroma] = None
+        self._retired: Optional[Chroma] = None
+        self._last_check = 0.0
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path
+
+    def get(self) -> Chroma:
+        now = time.monotonic()
+        if self._store is not None and now - self._last_check < self.check_interval:
+            return self._store
+        with self._lock:
+            self._last_check = now
+            path = active_path()
+            if path != self._path:
+                store = open_store(path)
+                # Keep the previous version open for requests still using it;
+                # the one before that can no longer be referenced
+                if self._retired is not None:
+                    _release_store(self._retired)
+                self._retired = self._store
+                self._store = store
+                self._path = path
+                logger.info(f"Serving vector store from {path}")
+        return self._store
+
+
+# Global instance
+versioned_store = VersionedVectorStore(check_interval=settings.CHROMA_VERSION_CHECK_SECONDS)
@@ -0,0 +1,249 @@
+# loadtest/driver.py
+
+"""
+Load-test driver. Starts the stub servers, optionally seeds the vector store with
+one scheduler run (`schedule_news.py --once`), starts the API with uvicorn and
+drives `/chat` at a fixed concurrency. Reports throughput, p50/p95/p99 latency,
+errors and the resident memory of each process over time.
+
+    python -m loadtest.driver --concurrency 16 --duration 60 --seed
+    python -m loadtest.driver --target scheduler
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+from loadtest.stubs import add_stub_arguments, stubs_from_args
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = [
+    "What's happening in the market today?",
+    "Any crypto news today",
+    "What is the latest news on NVDA?",
+    "How did Apple earnings do this quarter?",
+    "What does the Fed decision mean for tech stocks?",
+    "Why are oil prices rising?",
+    "What is a P/E ratio?",
+    "Explain how bond yields affect stocks",
+    "Is Tesla stock a buy after the latest news?",
+    "What are analysts saying about Microsoft guidance?"
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process and its children in MB (Linux /proc)"""
+    total_kb = 0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        pass
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1) if total_kb else None
+
+
+class MemorySampler:
+    """Samples a process's RSS on a background thread"""
+
+    def __init__(self, pid: int, interval: float = 1.0):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[Dict] = []
+        self._stop = threading.Event()
+        self._started = time.time()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            value = rss_mb(self.pid)
+            if value is not None:
+                self.samples.append({"t": round(time.time() - self._started, 1), "rss_mb": value})
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict:
+        self._stop.set()
+        self._thread.join()
+        values = [s["rss_mb"] for s in self.samples]
+        return {
+            "start_mb": values[0] if values else None,
+            "peak_mb": max(values) if values else None,
+            "end_mb": values[-1] if values else None,
+            "samples": self.samples
+        }
+
+
+def _app_env(stub_env: Dict, chroma_path: str) -> Dict:
+    env = dict(os.environ)
+    env.update(stub_env)
+    env["CHROMA_PATH"] = chroma_path
+    env.setdefault("INGEST_LEDGER_PATH", os.path.join(chroma_path, "ingest_ledger.sqlite3"))
+    env["PYTHONUNBUFFERED"] = "1"
+    return env
+
+
+def run_scheduler_once(env: Dict, log) -> Dict:
+    """One full ingestion run with `schedule_news.py --once`, timed and memory-sampled"""
+    started = time.time()
+    proc = subprocess.Popen([sys.executable, "schedule_news.py", "--once"], cwd=ROOT, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+    sampler = MemorySampler(proc.pid).start()
+    returncode = proc.wait()
+    return {"returncode": returncode, "seconds": round(time.time() - started, 1), "memory": sampler.stop()}
+
+
+def wait_for_api(base_url: str, timeout: float = 300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(1)
+    raise RuntimeError(f"API at {base_url} did not become healthy within {timeout:.0f}s")
+
+
+def drive_chat(base_url: str, concurrency: int, duration: float, timeout: float) -> Dict:
+    """Closed-loop load: `concurrency` workers each send the next query as soon as the previous returns"""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+    deadline = time.time() + duration
+
+    def worker(index: int):
+        rng = random.Random(index)
+        while time.time() < deadline:
+            body = json.dumps({"user_id": f"load-{index}", "query": rng.choice(QUERIES)}).encode("utf-8")
+            request = urllib.request.Request(
+                f"{base_url}/chat", data=body, headers={"Content-Type": "application/json"}, method="POST"
+            )
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    response.read()
+                    status = str(response.status)
+            except urllib.error.HTTPError as e:
+                status = str(e.code)
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == "200":
+                    latencies.append(elapsed)
+
+    started = time.time()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+    total = sum(statuses.values())
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 1),
+        "requests": total,
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(1 - len(latencies) / total, 4) if total else None,
+        "latency_ms": {
+            name: None if value is None else round(value * 1000, 1)
+            for name, value in (
+                ("p50", percentile(latencies, 50)),
+                ("p95", percentile(latencies, 95)),
+                ("p99", percentile(latencies, 99)),
+                ("max", max(latencies) if latencies else None)
+            )
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the chatbot API and scheduler against local stubs")
+    parser.add_argument("--target", choices=["api", "scheduler"], default="api")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=60, help="seconds of /chat load")
+    parser.add_argument("--request-timeout", type=float, default=120)
+    parser.add_argument("--seed", action="store_true", help="run the scheduler once before the API test")
+    parser.add_argument("--api-port", type=int, default=8100)
+    parser.add_argument("--chroma-path", default=None, help="vector store directory (default: a temp dir)")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    stubs = stubs_from_args(args)
+    chroma_path = args.chroma_path or tempfile.mkdtemp(prefix="loadtest-chroma-")
+    env = _app_env(stubs["env"], chroma_path)
+    log_path = os.path.join(chroma_path, "loadtest.log")
+    report = {"target": args.target, "chroma_path": chroma_path, "log": log_path, "stubs": stubs["env"]}
+
+    with open(log_path, "a", encoding="utf-8") as log:
+        if args.target == "scheduler" or args.seed:
+            print("Running the scheduler once...")
+            report["scheduler"] = run_scheduler_once(env, log)
+        if args.target == "api":
+            base_url = f"http://127.0.0.1:{args.api_port}"
+            api = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.api_port)],
+                cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+            )
+            try:
+                print("Waiting for the API...")
+                wait_for_api(base_url)
+                sampler = MemorySampler(api.pid).start()
+                print(f"Driving /chat with {args.concurrency} workers for {args.duration:.0f}s...")
+                report["chat"] = drive_chat(base_url, args.concurrency, args.duration, args.request_timeout)
+                report["api_memory"] = sampler.stop()
+            finally:
+                api.terminate()
+                api.wait(timeout=30)
+
+    report["stub_requests"] = {name: config.requests for name, config in stubs["configs"].items()}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    summary = {key: value for key, value in report.items() if key not in ("api_memory", "scheduler")}
+    if "api_memory" in report:
+        summary["api_memory"] = {k: v for k, v in report["api_memory"].items() if k != "samples"}
+    if "scheduler" in report:
+        summary["scheduler"] = dict(report["scheduler"], memory={
+            k: v for k, v in report["scheduler"]["memory"].items() if k != "samples"
+        })
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
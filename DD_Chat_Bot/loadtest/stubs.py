@@ -0,0 +1,317 @@
+# loadtest/stubs.py
+
+"""
+Local stand-ins for the external services, stdlib only:
+
+    groq       POST /openai/v1/chat/completions   OpenAI-compatible, optional SSE streaming
+    marketaux  GET  /v1/news/all                  MarketAux response shape
+    articles   GET  /rss, GET /articles/<n>.html  RSS feed and static article pages
+
+Point the app at them with GROQ_API_BASE, MARKETAUX_BASE_URL and RSS_FEED_OVERRIDE
+(`python -m loadtest.stubs` prints the exact values).
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs
+
+COMPANIES = [
+    ("AAPL", "Apple Inc."), ("MSFT", "Microsoft Corporation"), ("NVDA", "NVIDIA Corporation"),
+    ("AMZN", "Amazon.com, Inc."), ("TSLA", "Tesla, Inc."), ("JPM", "JPMorgan Chase & Co."),
+    ("XOM", "Exxon Mobil Corporation"), ("GOOGL", "Alphabet Inc.")
+]
+EVENTS = [
+    "beats quarterly earnings estimates", "shares slide after guidance cut", "announces share buyback",
+    "rallies as analysts upgrade outlook", "faces regulatory probe", "expands data center investment"
+]
+THEMES = [
+    "Fed signals patience on interest rates as inflation cools",
+    "Oil prices climb after OPEC extends output cuts",
+    "Bitcoin rebounds as crypto inflows pick up",
+    "Dollar weakens against the euro ahead of jobs report",
+    "Gold hits record as investors seek safety"
+]
+WORDS = ("market investors revenue growth quarter analysts guidance shares outlook demand margin "
+         "rates inflation earnings sector trading index volatility forecast").split()
+
+
+def _sentences(rng: random.Random, count: int) -> str:
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+        for _ in range(count)
+    )
+
+
+class Corpus:
+    """Deterministic fake articles; article `n` always has the same text"""
+
+    def __init__(self, size: int, article_base: str, paragraphs: int = 12):
+        self.size = size
+        self.article_base = article_base
+        self.paragraphs = paragraphs
+
+    def article(self, n: int) -> Dict:
+        rng = random.Random(n)
+        if n % 3 == 0:
+            symbol, name = None, None
+            title = f"{THEMES[n % len(THEMES)]} ({n})"
+        else:
+            symbol, name = COMPANIES[n % len(COMPANIES)]
+            title = f"{name.split()[0]} {EVENTS[n % len(EVENTS)]} ({n})"
+        return {
+            "n": n,
+            "title": title,
+            "summary": _sentences(rng, 3),
+            "body": [_sentences(rng, 5) for _ in range(self.paragraphs)],
+            "url": f"{self.article_base}/articles/{n}.html",
+            "published": (datetime(2024, 1, 1) + timedelta(minutes=17 * n)).isoformat() + "Z",
+            "symbol": symbol,
+            "name": name
+        }
+
+    def latest(self, limit: int) -> List[Dict]:
+        # A moving window so repeated polls see some new articles
+        head = self.size + int(time.time() // 60) % self.size
+        return [self.article(n) for n in range(head, max(head - limit, 0), -1)]
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float, jitter_ms: float, token_delay_ms: float,
+                 response_tokens: int, error_rate: float, corpus: Corpus):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_delay_ms = token_delay_ms
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.corpus = corpus
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def delay(self):
+        time.sleep(max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    config: StubConfig = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, payload):
+        self._send(status, json.dumps(payload).encode("utf-8"))
+
+
+class GroqHandler(_Handler):
+    """Chat completions with configurable latency, streaming token rate and error rate"""
+
+    def do_POST(self):
+        self.config.count()
+        if urlparse(self.path).path.rstrip("/") != "/openai/v1/chat/completions":
+            return self._json(404, {"error": {"message": "not found"}})
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.config.delay()
+        if random.random() < self.config.error_rate:
+            return self._json(503, {"error": {"message": "stub overloaded", "type": "server_error"}})
+
+        prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+        if 'respond with: "Related"' in prompt:
+            tokens = ["Related"]
+        else:
+            rng = random.Random(len(prompt))
+            tokens = [rng.choice(WORDS) for _ in range(self.config.response_tokens)]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = request.get("model", "stub")
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(tokens),
+            "total_tokens": len(prompt) // 4 + len(tokens)
+        }
+
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for i, token in enumerate(tokens):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token + " "}, "finish_reason": None}]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(self.config.token_delay_ms / 1000)
+            final = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"usage": usage}
+            }
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+            self.close_connection = True
+            return
+
+        time.sleep(self.config.token_delay_ms * len(tokens) / 1000)
+        self._json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(tokens)},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+
+class MarketAuxHandler(_Handler):
+    """`/v1/news/all` returning the latest articles of the corpus"""
+
+    def do_GET(self):
+        self.config.count()
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/v1/news/all":
+            return self._json(404, {"error": {"message": "not found"}})
+        params = parse_qs(url.query)
+        limit = int(params.get("limit", ["50"])[0])
+        self.config.delay()
+        data = []
+        for article in self.config.corpus.latest(limit):
+            entities = []
+            if article["symbol"]:
+                entities.append({
+                    "symbol": article["symbol"], "name": article["name"], "type": "equity",
+                    "sentiment_score": 0.2
+                })
+            data.append({
+                "uuid": str(uuid.UUID(int=article["n"])),
+                "title": article["title"],
+                "description": article["summary"],
+                "snippet": article["summary"][:120],
+                "url": article["url"],
+                "published_at": article["published"],
+                "source": "stub.local",
+                "entities": entities
+            })
+        self._json(200, {"meta": {"found": len(data), "returned": len(data), "limit": limit, "page": 1}, "data": data})
+
+
+class ArticleHandler(_Handler):
+    """RSS feed of the corpus and one static HTML page per article"""
+
+    def do_GET(self):
+        self.config.count()
+        path = urlparse(self.path).path
+        corpus = self.config.corpus
+        if path.rstrip("/") == "/rss":
+            items = "".join(
+                f"<item><title>{a['title']}</title><link>{a['url']}</link>"
+                f"<description>{a['summary']}</description><pubDate>{a['published']}</pubDate></item>"
+                for a in corpus.latest(50)
+            )
+            body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>Stub feed</title>{items}</channel></rss>'
+            return self._send(200, body.encode("utf-8"), "application/rss+xml")
+        if path.startswith("/articles/") and path.endswith(".html"):
+            try:
+                article = corpus.article(int(path[len("/articles/"):-len(".html")]))
+            except ValueError:
+                return self._send(404, b"not found", "text/plain")
+            paragraphs = "".join(f"<p>{p}</p>" for p in article["body"])
+            body = (f"<html><head><title>{article['title']}</title></head><body>"
+                    f"<article><h1>{article['title']}</h1>{paragraphs}</article></body></html>")
+            return self._send(200, body.encode("utf-8"), "text/html")
+        self._send(404, b"not found", "text/plain")
+
+
+def _serve(handler_cls, config: StubConfig, host: str, port: int) -> ThreadingHTTPServer:
+    handler = type(handler_cls.__name__, (handler_cls,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"stub-{handler_cls.__name__}", daemon=True).start()
+    return server
+
+
+def start_stubs(host: str = "127.0.0.1", groq_port: int = 9101, marketaux_port: int = 9102,
+                article_port: int = 9103, latency_ms: float = 800, jitter_ms: float = 200,
+                token_delay_ms: float = 15, response_tokens: int = 150, error_rate: float = 0.0,
+                corpus_size: int = 500) -> Dict:
+    """Start the three stub servers on background threads. Returns their servers, configs and env overrides."""
+    article_base = f"http://{host}:{article_port}"
+    corpus = Corpus(corpus_size, article_base)
+    llm = StubConfig(latency_ms, jitter_ms, token_delay_ms, response_tokens, error_rate, corpus)
+    # The news APIs answer quickly; LLM latency is the interesting knob
+    news = StubConfig(30, 10, 0, 0, 0.0, corpus)
+    servers = {
+        "groq": _serve(GroqHandler, llm, host, groq_port),
+        "marketaux": _serve(MarketAuxHandler, news, host, marketaux_port),
+        "articles": _serve(ArticleHandler, news, host, article_port)
+    }
+    env = {
+        "GROQ_API_BASE": f"http://{host}:{groq_port}",
+        "GROQ_API_KEY": "stub",
+        "MARKETAUX_BASE_URL": f"http://{host}:{marketaux_port}/v1",
+        "MARKETAUX_API_KEY": "stub",
+        "RSS_FEED_OVERRIDE": f"{article_base}/rss"
+    }
+    return {"servers": servers, "configs": {"llm": llm, "news": news}, "env": env}
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--groq-port", type=int, default=9101)
+    parser.add_argument("--marketaux-port", type=int, default=9102)
+    parser.add_argument("--article-port", type=int, default=9103)
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="time to first token")
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--token-delay-ms", type=float, default=15, help="delay per generated token")
+    parser.add_argument("--response-tokens", type=int, default=150)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="share of LLM calls answered with 503")
+    parser.add_argument("--corpus-size", type=int, default=500)
+
+
+def stubs_from_args(args) -> Dict:
+    return start_stubs(
+        host=args.host, groq_port=args.groq_port, marketaux_port=args.marketaux_port,
+        article_port=args.article_port, latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms,
+        token_delay_ms=args.token_delay_ms, response_tokens=args.response_tokens,
+        error_rate=args.llm_error_rate, corpus_size=args.corpus_size
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Groq, MarketAux and article stub servers")
+    add_stub_arguments(parser)
+    stubs = stubs_from_args(parser.parse_args())
+    print("Stub servers running. Environment for the app and scheduler:")
+    for key, value in stubs["env"].items():
+        print(f"export {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
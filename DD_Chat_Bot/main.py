@@ -1,19 +1,46 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Header, Response
+import os
+from datetime import datetime
 from typing import Dict, List, Optional
 from langgraph.graph import StateGraph, END
-from app.chatbot import build_graph, generate_response  # Import generate_response
+from app.admission import admission, AdmissionRejected, BATCH
+from app.chatbot import build_graph, answer_batch
 from app.config import settings
-from app.logging.logger import logger
+from app.digests import digest_store
+from app.index_maintenance import index_stats
+from app.llm import llm_status
+from app.logging.logger import logger, hot_logger, snippet
 from app.marketaux_client import marketaux_client
-from schema.chat_models import ChatInput, ChatResponse
-from schema.models import HealthStatus
+from app.news_stats import news_stats, cached_stats
+from app.profiling import profile, profile_header_allowed, should_profile
+from app.snapshot import snapshot_handle
+from app.vector_store import active_path
+from schema.chat_models import BatchChatInput, ChatInput, ChatResponse
+from schema.models import HealthStatus, TopicDigest, TopicType
 
 app = FastAPI(title="Financial News Chatbot", description="AI-powered chatbot for financial news and market analysis")
 user_sessions: Dict[str, List[Dict[str, str]]] = {}
 chatbot = build_graph()
 
+def _too_many_requests(e: AdmissionRejected, user_id: Optional[str] = None) -> HTTPException:
+    hot_logger.warning("Shed request from %s: %s", user_id, e.reason)
+    return HTTPException(status_code=429, detail=f"Too many requests: {e.reason}",
+                         headers={"Retry-After": str(e.retry_after)})
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(payload: ChatInput):
+def chat(payload: ChatInput, response: Response, x_profile: Optional[str] = Header(default=None)):
+    try:
+        with admission.admit(payload.user_id):
+            # Profile on request ("X-Profile: <PROFILE_HEADER_TOKEN>") or for a PROFILE_SAMPLE_RATE share of traffic
+            requested = x_profile if profile_header_allowed(x_profile) else None
+            with profile(f"chat-{payload.user_id}", enabled=should_profile(requested, settings.PROFILE_SAMPLE_RATE)) as trace:
+                if trace:
+                    response.headers["X-Profile-Trace"] = os.path.basename(trace)
+                return _chat(payload)
+    except AdmissionRejected as e:
+        raise _too_many_requests(e, payload.user_id)
+
+def _chat(payload: ChatInput):
     try:
         if not payload.query or not payload.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
@@ -24,34 +51,119 @@ def chat(payload: ChatInput):
             "memory": memory
         }
         
-        logger.info(f"Received query from {payload.user_id}: {payload.query}")
-        # Retrieve news and generate response using LLM
+        hot_logger.info("Received query from %s: %s", payload.user_id, snippet(payload.query))
+        # Guardrail, retrieval and the LLM answer all run inside the graph
         state = chatbot.invoke(state)
-        state = generate_response(state)  # Explicitly call LLM
         #import pdb; pdb.set_trace()  # Debugging line, remove in production
         # Update memory with the latest exchange
         state["memory"].append({"user": payload.query, "bot": state["response"]})
         user_sessions[payload.user_id] = state["memory"]
         
-        # Ensure response is a string
-        response_obj = state.get("response")
-        if hasattr(response_obj, "content"):
-            response_str = response_obj.content
-        elif isinstance(response_obj, str):
-            response_str = response_obj
-        else:
-            response_str = "No response generated."
-
         return ChatResponse(
-            response=response_str,
+            response=_response_text(state),
             topic=state.get("topic", "general"),
             confidence=None,
             user_id=payload.user_id
         )
     except Exception as e:
-        logger.error(f"Error processing chat request: {str(e)}")
+        logger.error("Error processing chat request: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.post("/chat/batch", response_model=List[ChatResponse])
+def chat_batch(payloads: List[BatchChatInput]):
+    """Answer a list of queries concurrently; failures are reported per item"""
+    if len(payloads) > settings.BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size exceeds limit of {settings.BATCH_MAX_SIZE}")
+
+    # Empty queries fail per item, as /chat rejects them, and take no slot or rate limit token
+    invalid = {i for i, p in enumerate(payloads) if not p.query or not p.query.strip()}
+    valid = [i for i in range(len(payloads)) if i not in invalid]
+    limited: Dict[int, AdmissionRejected] = {}
+    outcomes: List = [None] * len(payloads)
+    if valid:
+        try:
+            # Items run at most one per held slot, so a batch never exceeds ADMISSION_MAX_CONCURRENT
+            with admission.slots(min(settings.BATCH_MAX_CONCURRENCY, len(valid)), BATCH) as held:
+                # Tokens are spent only once admitted: one per user per batch, so a large eval batch from
+                # one user costs the same as a chat; items of a rate-limited user fail individually
+                user_limits: Dict[str, Optional[AdmissionRejected]] = {}
+                for i in valid:
+                    p = payloads[i]
+                    if p.user_id not in user_limits:
+                        try:
+                            admission.check_rate(p.user_id)
+                            user_limits[p.user_id] = None
+                        except AdmissionRejected as e:
+                            user_limits[p.user_id] = e
+                    if user_limits[p.user_id] is not None:
+                        limited[i] = user_limits[p.user_id]
+                admitted = [i for i in valid if i not in limited]
+                states = [{"query": payloads[i].query, "memory": list(user_sessions.get(payloads[i].user_id, []))}
+                          for i in admitted]
+                hot_logger.info("Received batch of %d queries (%d empty, %d rate limited, %d slots)",
+                                len(payloads), len(invalid), len(limited), held)
+                if states:
+                    for i, outcome in zip(admitted, answer_batch(states, max_concurrency=held)):
+                        outcomes[i] = outcome
+        except AdmissionRejected as e:
+            raise _too_many_requests(e)
+    for i, e in limited.items():
+        outcomes[i] = e
+    for i in invalid:
+        outcomes[i] = ValueError("Query cannot be empty")
+
+    responses = []
+    for payload, outcome in zip(payloads, outcomes):
+        if isinstance(outcome, Exception):
+            responses.append(ChatResponse(response="", user_id=payload.user_id, error=str(outcome)))
+            continue
+        response_str = _response_text(outcome)
+        user_sessions.setdefault(payload.user_id, []).append({"user": payload.query, "bot": response_str})
+        responses.append(ChatResponse(
+            response=response_str,
+            topic=outcome.get("topic", "general"),
+            confidence=None,
+            user_id=payload.user_id
+        ))
+    return responses
+
+def _response_text(state) -> str:
+    """Ensure the response is a string"""
+    response_obj = state.get("response")
+    if hasattr(response_obj, "content"):
+        return response_obj.content
+    elif isinstance(response_obj, str):
+        return response_obj
+    return "No response generated."
+
+@app.get("/digest/{topic}", response_model=TopicDigest)
+def get_digest(topic: TopicType):
+    """Latest precomputed digest for a topic"""
+    digest = digest_store.get(topic.value)
+    if not digest:
+        raise HTTPException(status_code=404, detail=f"No digest available for {topic.value}")
+    return digest
+
+@app.get("/stats")
+def get_stats():
+    """Ingestion counters, vector index health and LLM status (cached for STATS_CACHE_SECONDS), plus live admission metrics"""
+    def build():
+        try:
+            if settings.SNAPSHOT_PATH:
+                index = dict(snapshot_handle.get()._collection.manifest, path=settings.SNAPSHOT_PATH)
+            else:
+                index = index_stats(active_path())
+        except Exception as e:
+            logger.error(f"Error reading vector index stats: {str(e)}")
+            index = {"error": str(e)}
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "ingestion": news_stats.snapshot(),
+            "index": index,
+            "llm": llm_status()
+        }
+    return dict(cached_stats(build), admission=admission.status())
+
 @app.get("/health", response_model=HealthStatus)
 def health_check():
     return HealthStatus(
@@ -66,6 +178,9 @@ def root():
         "message": "Financial News Chatbot API",
         "endpoints": {
             "chat": "/chat",
+            "chat_batch": "/chat/batch",
+            "digest": "/digest/{topic}",
+            "stats": "/stats",
             "health": "/health"
            
         }
@@ -1,16 +1,23 @@
 # schedule_news.py
 
+import argparse
 import time
 import schedule
-import logging
 from datetime import datetime, timedelta
 from typing import Dict, List
-from app.news_fetcher import fetch_combined_news, process_and_store, get_news_statistics
+from app.news_fetcher import get_news_statistics
+from app.ingest_pipeline import run_ingestion
+from app.ingest_ledger import ingest_ledger
+from app.source_registry import source_registry
+from app.profiling import profile, should_profile
+from app.scheduler_config import get_scheduler_config
 from app.logging.logger import logger
 from app.config import settings
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.vectorstores import Chroma
 from app.marketaux_client import marketaux_client
+from app.symbol_index import staging_symbol_index
+from app.vector_store import open_staging_store, publish_staging, staging_path
+from app.index_maintenance import compact_if_needed, index_stats, record_deletions
+from app.news_stats import staging_news_stats, articles_from_chunks
 
 
 class EnhancedNewsScheduler:
@@ -25,35 +32,32 @@ class EnhancedNewsScheduler:
             "articles_fetched": 0,
             "last_successful_run": None
         }
-        self.setup_logging()
     
-    def setup_logging(self):
-        """Setup enhanced logging for the scheduler"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('scheduler.log'),
-                logging.StreamHandler()
-            ]
-        )
+    def run_job(self, name: str, job):
+        """Run a job, profiling it when enabled for it in SCHEDULER_CONFIG["profiling"] or PROFILE_JOBS"""
+        profiling = get_scheduler_config()["profiling"]
+        jobs = set(settings.PROFILE_JOBS)
+        if profiling["enabled"]:
+            jobs.update(profiling["jobs"])
+        enabled = "all" in jobs or name in jobs or should_profile(None, profiling["sample_rate"])
+        with profile(f"job-{name}", enabled=enabled):
+            return job()
     
-    def fetch_by_frequency(self, frequency: str):
+    def fetch_by_frequency(self, frequency: str, candidates=None):
         """Fetch news based on update frequency"""
         logger.info(f" Starting {frequency} news fetch...")
         
         try:
             logger.info(f" Fetching news with {frequency} frequency")
             
-            # Fetch news from both Yahoo Finance RSS and MarketAux
-            news = fetch_combined_news()
+            # Stream news from both Yahoo Finance RSS and MarketAux into the vector store
+            ingest_stats = run_ingestion(candidates)
             #market_aux_news = pr()
-            if news:
-                process_and_store(news)
-                self.run_stats["articles_fetched"] += len(news)
+            if ingest_stats["articles"]:
+                self.run_stats["articles_fetched"] += ingest_stats["articles"]
                 self.run_stats["successful_runs"] += 1
                 self.run_stats["last_successful_run"] = datetime.now()
-                logger.info(f" {frequency} fetch completed successfully - {len(news)} articles")
+                logger.info(f" {frequency} fetch completed successfully - {ingest_stats['articles']} articles")
             else:
                 logger.warning(f" {frequency} fetch completed but no articles found")
                 
@@ -64,6 +68,12 @@ class EnhancedNewsScheduler:
         self.run_stats["total_runs"] += 1
         self.last_run[frequency] = datetime.now()
     
+    def poll_sources_job(self):
+        """Poll the registered sources that are due, by priority and observed update rate"""
+        due = source_registry.due_sources()
+        if due:
+            self.fetch_by_frequency("adaptive", source_registry.iter_candidates(due))
+    
     def hourly_job(self):
         """Fetch from hourly sources"""
         self.fetch_by_frequency("hourly")
@@ -81,19 +91,17 @@ class EnhancedNewsScheduler:
         logger.info(" Starting comprehensive news fetch...")
         
         try:
-            # Fetch all news from both sources
-            news = fetch_combined_news()
+            # Stream all news from both sources into the vector store
+            ingest_stats = run_ingestion()
             #articles = marketaux_client.get_news_sentiment(limit=100)
-            combined = (news or []) #+ (articles or [])  # Increase limit as needed
-            if combined:
-                process_and_store(news)
-                self.run_stats["articles_fetched"] += len(news)
+            if ingest_stats["articles"]:
+                self.run_stats["articles_fetched"] += ingest_stats["articles"]
                 self.run_stats["successful_runs"] += 1
                 self.run_stats["last_successful_run"] = datetime.now()
                 
                 # Get news statistics
                 news_stats = get_news_statistics()
-                logger.info(f"Comprehensive fetch completed - {len(news)} articles")
+                logger.info(f"Comprehensive fetch completed - {ingest_stats['articles']} articles")
                 logger.info(f"Vector store now contains {news_stats.get('total_documents', 'unknown')} documents")
             else:
                 logger.warning("Comprehensive fetch completed but no articles found")
@@ -120,6 +128,10 @@ class EnhancedNewsScheduler:
                 "scheduler_stats": self.run_stats,
                 "success_rate": f"{success_rate:.1f}%",
                 "news_stats": news_stats,
+                "staging_index": index_stats(staging_path(), latency_samples=0),
+                "ingested": staging_news_stats.snapshot(),
+                "ingestion": ingest_ledger.summary(),
+                "sources": source_registry.status(),
                 "last_runs": {k: v.isoformat() if v else None for k, v in self.last_run.items()}
             }
             
@@ -127,7 +139,16 @@ class EnhancedNewsScheduler:
             logger.info(f"   Total Runs: {self.run_stats['total_runs']}")
             logger.info(f"   Success Rate: {success_rate:.1f}%")
             logger.info(f"   Articles Fetched: {self.run_stats['articles_fetched']}")
+            logger.info(f"   Articles Stored: {health_report['ingested']['totals']['articles']} "
+                        f"(latest published {health_report['ingested']['latest_published']})")
             logger.info(f"   Vector Store Documents: {news_stats.get('total_documents', 'unknown')}")
+            logger.info(f"   Index: {news_stats.get('disk_bytes', 0) / 1e6:.1f} MB on disk, "
+                        f"deleted ratio {health_report['staging_index']['deleted_ratio']:.2%} (staging), "
+                        f"query latency {news_stats.get('query_latency_ms')}")
+            last_ingest = health_report["ingestion"].get("last_run") or {}
+            logger.info(f"   Last Ingestion Run: {last_ingest.get('run_id', 'none')} "
+                        f"({last_ingest.get('status', 'n/a')}, {last_ingest.get('batches', 0)} batches, "
+                        f"{last_ingest.get('resumes', 0)} resumes)")
             
             return health_report
             
@@ -139,8 +160,7 @@ class EnhancedNewsScheduler:
         """Cleanup old data and remove all existing content in Chroma DB"""
         logger.info("Starting cleanup job...")
         try:
-            embedder = HuggingFaceEmbeddings(model_name=settings.EMBED_MODEL)
-            vectorstore = Chroma(persist_directory=settings.CHROMA_PATH, embedding_function=embedder)
+            vectorstore = open_staging_store()
             collection = vectorstore._collection
 
             # Calculate cutoff date
@@ -149,13 +169,23 @@ class EnhancedNewsScheduler:
             # Get all IDs and delete them
             result = collection.get(include=["metadatas", "ids"])
             ids_to_delete = []
+            deleted_metadatas = []
             for idx, metadata in enumerate(result.get("metadatas", [])):
                 doc_date = metadata.get("date")
                 if doc_date and doc_date < cutoff_date:
                     ids_to_delete.append(result["ids"][idx])
+                    deleted_metadatas.append(metadata)
 
             if ids_to_delete:
                 collection.delete(ids=ids_to_delete)
+                record_deletions(len(ids_to_delete))
+                staging_symbol_index.remove_ids(ids_to_delete)
+                staging_symbol_index.save()
+                staging_news_stats.remove_articles(articles_from_chunks(deleted_metadatas))
+                staging_news_stats.save()
+                # Rebuilds (and publishes) when deletions have bloated the index, else publish as is
+                if compact_if_needed() is None:
+                    publish_staging()
                 logger.info(f"Cleanup completed: Removed {len(ids_to_delete)} documents older than 30 days from Chroma DB.")
             else:
                 logger.info("Cleanup completed: No month-old documents found in Chroma DB.")
@@ -173,22 +203,22 @@ class EnhancedNewsScheduler:
         """Setup the scheduling configuration"""
         logger.info("Setting up enhanced news scheduler...")
         
-        # Schedule based on update frequencies
-        schedule.every().hour.do(self.hourly_job)
-        schedule.every().day.at("06:00").do(self.daily_job)
-        schedule.every().sunday.at("08:00").do(self.weekly_job)
+        # Registered sources are polled when due; fast-moving sources come up more often
+        schedule.every(1).minutes.do(self.run_job, "poll_sources", self.poll_sources_job)
+        schedule.every().day.at("06:00").do(self.run_job, "daily", self.daily_job)
+        schedule.every().sunday.at("08:00").do(self.run_job, "weekly", self.weekly_job)
         
         # Comprehensive fetch every 6 hours
-        schedule.every(6).hours.do(self.full_fetch_job)
+        schedule.every(6).hours.do(self.run_job, "full_fetch", self.full_fetch_job)
         
         # Health check every 2 hours
-        schedule.every(2).hours.do(self.health_check_job)
+        schedule.every(2).hours.do(self.run_job, "health_check", self.health_check_job)
         
         # Cleanup every day at 2 AM
         #schedule.every().day.at("02:00").do(self.cleanup_job)
         
         logger.info(" Schedule configured:")
-        logger.info("    Hourly sources: Every hour")
+        logger.info(f"    Registered sources: adaptive polling ({', '.join(source_registry.sources)})")
         logger.info("    Daily sources: 6:00 AM daily")
         logger.info("    Weekly sources: 8:00 AM Sundays")
         logger.info("    Comprehensive fetch: Every 6 hours")
@@ -198,13 +228,13 @@ class EnhancedNewsScheduler:
     def run(self):
         """Run the scheduler"""
         logger.info(" Starting Enhanced News Scheduler...")
-        self.cleanup_job()
+        self.run_job("cleanup", self.cleanup_job)
         # Initial setup
         self.setup_schedule()
         
         # Perform initial fetch
         logger.info(" Performing initial fetch...")
-        self.full_fetch_job()
+        self.run_job("full_fetch", self.full_fetch_job)
         
         # Health check
         #elf.health_check_job()
@@ -225,7 +255,13 @@ class EnhancedNewsScheduler:
 
 def main():
     """Main function to run the enhanced scheduler"""
+    parser = argparse.ArgumentParser(description="Financial news scheduler")
+    parser.add_argument("--once", action="store_true", help="run one comprehensive fetch and exit")
+    args = parser.parse_args()
     scheduler = EnhancedNewsScheduler()
+    if args.once:
+        scheduler.run_job("full_fetch", scheduler.full_fetch_job)
+        raise SystemExit(1 if scheduler.run_stats["failed_runs"] else 0)
     scheduler.run()
 
 if __name__ == "__main__":
@@ -1,26 +1,33 @@
 # Schema package for data models
 
-from .chat_models import ChatInput, ChatResponse
+from .chat_models import BatchChatInput, ChatInput, ChatResponse
 from .models import (
     TopicType,
     NewsSource,
     NewsItem,
+    DigestHeadline,
+    TopicDigest,
     ChatSession,
     ChatMessage,
     HealthStatus,
     ErrorResponse,
     TopicClassificationResult
 )
+from .records import ArticleRecord
 
 __all__ = [
+    "BatchChatInput",
     "ChatInput",
     "ChatResponse",
     "TopicType",
     "NewsSource", 
     "NewsItem",
+    "DigestHeadline",
+    "TopicDigest",
     "ChatSession",
     "ChatMessage",
     "HealthStatus",
     "ErrorResponse",
-    "TopicClassificationResult"
+    "TopicClassificationResult",
+    "ArticleRecord"
 ] 
\ No newline at end of file
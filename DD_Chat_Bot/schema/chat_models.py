@@ -6,9 +6,14 @@ class ChatInput(BaseModel):
     user_id: str = Field(..., description="Unique identifier for the user")
     query: str = Field(..., description="User's message or question", min_length=1)
 
+class BatchChatInput(ChatInput):
+    """Input model for one item of a batch; empty queries are rejected per item instead of failing the batch"""
+    query: str = Field(..., description="User's message or question")
+
 class ChatResponse(BaseModel):
     """Response model for chat requests"""
     response: str = Field(..., description="Bot's response to the user's query")
     topic: Optional[str]  = Field(default="general", description="Classified topic of the query")
     confidence: Optional[str]  = Field(default=None, description="Confidence level of topic classification")
-    user_id: Optional[str] = Field(default=None, description="User ID for session tracking") 
\ No newline at end of file
+    user_id: Optional[str] = Field(default=None, description="User ID for session tracking")
+    error: Optional[str] = Field(default=None, description="Error message when this item of a batch failed")
\ No newline at end of file
@@ -28,6 +28,24 @@ class NewsItem(BaseModel):
     date: datetime = Field(default_factory=datetime.now)
     source: str = Field(..., description="Source of the news")
 
+class DigestHeadline(BaseModel):
+    """Model for a headline included in a topic digest"""
+    title: str = Field(..., description="News headline")
+    summary: str = Field(default="", description="Short news summary")
+    link: str = Field(default="", description="Link to full article")
+    source: str = Field(default="", description="Source of the news")
+    date: str = Field(default="", description="Publication or fetch date")
+    topic: TopicType = Field(..., description="Topic classification")
+
+class TopicDigest(BaseModel):
+    """Model for a precomputed per-topic news digest"""
+    topic: TopicType = Field(..., description="Digest topic")
+    generated_at: datetime = Field(..., description="When the digest was last refreshed")
+    run_id: Optional[str] = Field(default=None, description="Ingestion run that refreshed the digest")
+    article_count: int = Field(..., description="Articles the refreshing run contributed")
+    summary: str = Field(..., description="Digest summary")
+    headlines: List[DigestHeadline] = Field(default_factory=list, description="Most recent headlines")
+
 class ChatSession(BaseModel):
     """Model for chat session data"""
     user_id: str = Field(..., description="Unique user identifier")
@@ -0,0 +1,107 @@
+import hashlib
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+# Values repeated across thousands of articles are interned so they are stored once
+_INTERNED = ("source", "api_source", "topic", "language", "sentiment_label")
+
+
+class ArticleRecord:
+    """
+    Compact in-memory form of a news article as it moves through ingestion.
+    Slotted, so a record costs a fraction of the equivalent dict; the article text
+    lives only in `content` and each chunk shares one metadata dict per article.
+    """
+
+    __slots__ = (
+        "title", "summary", "link", "source", "date", "published", "author", "api_source", "topic",
+        "content", "symbols", "entities", "sentiment_score", "sentiment_label", "language", "_article_id"
+    )
+
+    def __init__(self, title: str, summary: str = "", link: str = "", source: str = "", date: str = "",
+                 published: str = "", author: str = "", api_source: str = "rss", topic: str = "",
+                 content: str = "", symbols: Iterable[str] = (), entities: Optional[Dict[str, str]] = None,
+                 sentiment_score: Optional[float] = None, sentiment_label: Optional[str] = None,
+                 language: str = "", article_id: Optional[str] = None):
+        self.title = title
+        self.summary = summary
+        self.link = link
+        self.source = source
+        self.date = date or datetime.now().isoformat()
+        self.published = published
+        self.author = author
+        self.api_source = api_source
+        self.topic = topic
+        self.content = content
+        self.symbols = tuple(symbols)
+        self.entities = entities or None
+        self.sentiment_score = sentiment_score
+        self.sentiment_label = sentiment_label
+        self.language = language
+        self._article_id = article_id
+        for name in _INTERNED:
+            value = getattr(self, name)
+            if value:
+                setattr(self, name, sys.intern(value))
+
+    @property
+    def article_id(self) -> str:
+        """Stable ID derived from the link (or title) so re-ingesting an article upserts instead of duplicating"""
+        if self._article_id is None:
+            key = self.link or self.title
+            self._article_id = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return self._article_id
+
+    def document_text(self) -> str:
+        """Text that is chunked and embedded: the article body when downloaded, else the summary"""
+        if self.content.strip():
+            return f"Title: {self.title}\n\nArticle: {self.content.strip()}\nSource: {self.source}"
+        return f"Title: {self.title}\n\nSummary: {self.summary}\nSource: {self.source}"
+
+    def chunk_metadata(self, symbols: Optional[Iterable[str]] = None) -> Dict:
+        """Metadata stored with each of the article's chunks; the article text itself is not repeated here"""
+        return {
+            "article_id": self.article_id,
+            "symbols": ",".join(self.symbols if symbols is None else symbols),
+            "title": self.title,
+            "summary": self.summary,
+            "link": self.link,
+            "source": self.source,
+            "date": self.date,
+            "published": self.published,
+            "author": self.author,
+            "api_source": self.api_source
+        }
+
+    def to_dict(self) -> Dict:
+        """Plain dict for JSON (ingestion ledger, API responses)"""
+        data = {name: getattr(self, name) for name in self.__slots__ if name != "_article_id"}
+        data["symbols"] = list(self.symbols)
+        data["article_id"] = self.article_id
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ArticleRecord":
+        """Build from `to_dict` output or the older dict layout (`article_content`, `mentioned_symbols`)"""
+        return cls(
+            title=data.get("title", ""),
+            summary=data.get("summary", ""),
+            link=data.get("link", ""),
+            source=data.get("source", ""),
+            date=data.get("date", ""),
+            published=data.get("published", ""),
+            author=data.get("author", ""),
+            api_source=data.get("api_source", "rss"),
+            topic=data.get("topic", ""),
+            content=data.get("content", data.get("article_content", "")),
+            symbols=data.get("symbols", data.get("mentioned_symbols", ())),
+            entities=data.get("entities"),
+            sentiment_score=data.get("sentiment_score"),
+            sentiment_label=data.get("sentiment_label"),
+            language=data.get("language", ""),
+            article_id=data.get("article_id")
+        )
+
+    def __repr__(self) -> str:
+        return f"ArticleRecord({self.article_id}, {self.title[:60]!r})"
@@ -0,0 +1,36 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app import llm
+from app.llm import CLOSED, OPEN, CircuitBreaker, LLMUnavailable
+
+
+@pytest.fixture
+def single_worker(monkeypatch):
+    """One-worker pool, so a call can be held up behind a blocked worker"""
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(llm, "_pool", pool)
+    yield pool
+    pool.shutdown(wait=False)
+
+
+def test_half_open_trial_that_never_starts_reopens_breaker(monkeypatch, single_worker):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    monkeypatch.setattr(llm, "breaker", breaker)
+    monkeypatch.setattr(llm, "_call", lambda prompt: "ok")
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+
+    # The trial queues behind a busy worker and is cancelled at its deadline
+    release = threading.Event()
+    single_worker.submit(release.wait, 5)
+    with pytest.raises(LLMUnavailable):
+        llm.invoke("prompt", deadline=0.05, hedge=False)
+    assert breaker.state == OPEN
+
+    release.set()
+    time.sleep(0.06)
+    assert llm.invoke("prompt", deadline=1.0, hedge=False) == "ok"
+    assert breaker.state == CLOSED